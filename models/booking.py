@@ -23,6 +23,19 @@ from utils.booking_viewer_utils import (
 # Import the CheckInInstructions class - we'll keep this separate
 from models.check_in_instructions import CheckInInstructions
 
+# Badge colors for booking sources shown in the booking header
+SOURCE_COLORS = {
+    "Airbnb": "#FF5A5F",       # Airbnb red
+    "Booking.com": "#003580",   # Booking.com blue
+    "Expedia": "#00355F",       # Expedia blue
+    "Jalan": "#FF0000",         # Jalan red
+    "Book & Pay": "#00A699",    # Teal green
+    "HN Staff": "#6B5B95",      # Purple
+}
+
+# Default color for unknown sources
+DEFAULT_SOURCE_COLOR = "#6B7280"  # Gray
+
 @dataclass
 class Booking:
     """
@@ -326,16 +339,16 @@ class Booking:
         self.booking_source_1 = "Unknown"
         self.booking_source_2 = "Unknown"
         
-        # Make sure we have a custom_id to work with
-        if not hasattr(self, 'custom_id'):
-            self.custom_id = ""
+        # Read parsed fields straight from the instance dict (no hasattr probing)
+        attrs = self.__dict__
         
-        custom_id = str(self.custom_id) if self.custom_id is not None else ""
+        # Make sure we have a custom_id to work with
+        custom_id = attrs.setdefault('custom_id', "")
+        custom_id = str(custom_id) if custom_id is not None else ""
         
         # Get booking_source if available
-        booking_source = ""
-        if hasattr(self, 'booking_source'):
-            booking_source = str(self.booking_source) if self.booking_source is not None else ""
+        booking_source = attrs.get('booking_source')
+        booking_source = str(booking_source) if booking_source is not None else ""
         
         # Check for OTAs based on custom_id patterns
         if custom_id:
@@ -511,29 +524,15 @@ class Booking:
         st.write(f"Created - {self.created_date} ")
 
         # Display booking source right after creation date with color coding
-        if hasattr(self, 'booking_source_1') and self.booking_source_1 != "Unknown":
-            # Define color mapping for different booking sources
-            source_colors = {
-                "Airbnb": "#FF5A5F",       # Airbnb red
-                "Booking.com": "#003580",   # Booking.com blue
-                "Expedia": "#00355F",       # Expedia blue
-                "Jalan": "#FF0000",         # Jalan red
-                "Book & Pay": "#00A699",    # Teal green
-                "HN Staff": "#6B5B95",      # Purple
-            }
-            
-            # Default color for unknown sources
-            default_color = "#6B7280"  # Gray
-            
-            # Determine source text and color
-            if hasattr(self, 'booking_source_2') and self.booking_source_2 and self.booking_source_2 != "Unknown" and self.booking_source_1 != self.booking_source_2:
-                source_text = f"{self.booking_source_1} - {self.booking_source_2}"
-                # Use the color for booking_source_2 if available, otherwise use default
-                color = source_colors.get(self.booking_source_2, default_color)
-            else:
-                source_text = f"{self.booking_source_1}"
-                # Use the color for booking_source_1 if available, otherwise use default
-                color = source_colors.get(self.booking_source_1, default_color)
+        attrs = self.__dict__
+        source_1 = attrs.get('booking_source_1') or "Unknown"
+        source_2 = attrs.get('booking_source_2') or "Unknown"
+        
+        if source_1 != "Unknown":
+            # Show the second channel (and use its color) only when it adds detail
+            detailed = source_2 != "Unknown" and source_2 != source_1
+            source_text = f"{source_1} - {source_2}" if detailed else source_1
+            color = SOURCE_COLORS.get(source_2 if detailed else source_1, DEFAULT_SOURCE_COLOR)
             
             # Display the booking source with color coding
             st.markdown(
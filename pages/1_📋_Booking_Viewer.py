@@ -5,6 +5,7 @@ import streamlit as st
 import json
 import datetime
 import pandas as pd
+import requests
 
 from models.booking import Booking
 from services.api_list_booking import call_api
@@ -194,6 +195,21 @@ def apply_custom_styles():
         unsafe_allow_html=True
     )
 
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_booking_json(booking_id):
+    """listBooking payload for a booking ID, cached for 5 minutes so reruns don't call RoomBoss again"""
+    response = call_api(
+        booking_id,
+        st.secrets["roomboss"]["api_id"],
+        st.secrets["roomboss"]["api_key"]
+    )
+    
+    # Raise rather than return so failed lookups are never cached
+    if not response.ok:
+        raise requests.HTTPError(f"{response.status_code} - {response.reason}")
+    
+    return json.loads(response.content)
+
 def fetch_booking_data(booking_id):
     """
     Call the API and return the booking data
@@ -208,15 +224,15 @@ def fetch_booking_data(booking_id):
         # Ensure booking_id is stripped of whitespace
         booking_id = booking_id.strip()
         
-        with st.spinner("Fetching booking details..."):
-            response = call_api(
-                booking_id,
-                st.secrets["roomboss"]["api_id"],
-                st.secrets["roomboss"]["api_key"]
-            )
+        try:
+            with st.spinner("Fetching booking details..."):
+                json_response = fetch_booking_json(booking_id)
+        except requests.HTTPError as e:
+            st.error(f"Error fetching booking: {e}")
+            return None
         
-        if response.ok:
-            booking = Booking(json.loads(response.text), api_type="listBooking")
+        if json_response:
+            booking = Booking(json_response, api_type="listBooking")
             
             # Update the property name and guest name in recent bookings if this is a valid booking
             if "recent_bookings" in st.session_state:
@@ -270,7 +286,6 @@ def fetch_booking_data(booking_id):
                         
             return booking
         else:
-            st.error(f"Error fetching booking: {response.status_code} - {response.reason}")
             return None
     except Exception as e:
         st.error(f"Error: {str(e)}")
@@ -596,6 +611,8 @@ def main():
         # Simply remove last_search from session state
         if "last_search" in st.session_state:
             del st.session_state.last_search
+        # Drop cached payloads so the next search is fetched fresh
+        fetch_booking_json.clear()
         # Rerun the app with a clean state
         st.rerun()
     
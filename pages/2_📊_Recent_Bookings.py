@@ -3,9 +3,10 @@
 
 import streamlit as st
 import datetime
+import io
+from operator import itemgetter
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from ui.recent_bookings import RecentBookingsManager
 
 # Page configuration
@@ -16,6 +17,69 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Key lookups for the per-booking sums in the analytics block
+_get_price = itemgetter('sell_price_raw')
+_get_nights = itemgetter('nights')
+
+# Booking fields included in the enhanced CSV export, mapped to their column headers
+_EXPORT_COLUMNS = {
+    'e_id': 'eID',
+    'booking_id': 'Booking ID',
+    'guest_name': 'Guest Name',
+    'checkin_date_raw': 'Check-in Date',  # Use raw date for export
+    'checkout_date_raw': 'Check-out Date',
+    'nights': 'Nights',
+    'country': 'Country',
+    'guests': 'Guests',
+    'vendor': 'Vendor',
+    'booking_source': 'Booking Source',
+    'sell_price_raw': 'Sell Price',
+    'amount_invoiced_raw': 'Amount Invoiced',
+    'amount_received_raw': 'Amount Received',
+    'status': 'Status',
+    'booking_type': 'Booking Type',
+    'extent': 'Extent',
+    'created_date': 'Created Date',
+    'service_name': 'Service Name',
+    'package_id': 'Package ID',
+}
+_EXPORT_DEFAULTS = {
+    field: 0 if field in ('nights', 'guests', 'sell_price_raw', 'amount_invoiced_raw', 'amount_received_raw') else ''
+    for field in _EXPORT_COLUMNS
+}
+
+# Fixed-length filter options mapped to the number of days they cover
+_FIXED_DAYS = {
+    "Last 24 hours": 1,
+    "2 days": 2,
+    "3 days": 3,
+    "5 days": 5,
+    "7 days": 7,
+    "14 days": 14,
+}
+
+def _mtd_days():
+    """Number of days from the start of the month to today (inclusive)"""
+    today = datetime.date.today()
+    return (today - today.replace(day=1)).days + 1
+
+def _days_in_period(filter_option, start_date=None, end_date=None):
+    """Number of days covered by a filter option, defaulting to 7"""
+    days = _FIXED_DAYS.get(filter_option)
+    if days:
+        return days
+    if filter_option == "Month to Date":
+        return _mtd_days()
+    if filter_option == "Custom" and start_date and end_date:
+        return (end_date - start_date).days + 1
+    return 7  # Default fallback
+
+def _group_source(source):
+    """Group all staff booking sources under a single 'Staff' channel"""
+    if 'staff' in source.lower():
+        return 'Staff'
+    return source
+
 # Initialize the recent bookings manager
 def get_recent_bookings_manager():
     # Initialize session state first
@@ -39,91 +103,394 @@ def get_recent_bookings_manager():
     
     return RecentBookingsManager()
 
-def create_enhanced_csv_export(bookings_data):
+def create_enhanced_csv_export(bookings_df):
     """Create CSV export with enhanced booking data including new fields"""
-    if not bookings_data:
+    if bookings_df is None or bookings_df.empty:
         return None
     
-    # Convert to DataFrame with all the enhanced fields
-    export_data = []
-    for booking in bookings_data:
-        export_data.append({
-            'eID': booking.get('e_id', ''),
-            'Booking ID': booking.get('booking_id', ''),
-            'Guest Name': booking.get('guest_name', ''),
-            'Check-in Date': booking.get('checkin_date_raw', ''),  # Use raw date for export
-            'Check-out Date': booking.get('checkout_date_raw', ''),
-            'Nights': booking.get('nights', 0),
-            'Country': booking.get('country', ''),
-            'Guests': booking.get('guests', 0),
-            'Vendor': booking.get('vendor', ''),
-            'Booking Source': booking.get('booking_source', ''),
-            'Sell Price': booking.get('sell_price_raw', 0),
-            'Amount Invoiced': booking.get('amount_invoiced_raw', 0),
-            'Amount Received': booking.get('amount_received_raw', 0),
-            'Status': booking.get('status', ''),
-            'Booking Type': booking.get('booking_type', ''),
-            'Extent': booking.get('extent', ''),
-            'Created Date': booking.get('created_date', ''),
-            'Service Name': booking.get('service_name', ''),
-            'Package ID': booking.get('package_id', '')
-        })
-    
-    df = pd.DataFrame(export_data)
-    return df.to_csv(index=False)
+    # Select the enhanced fields, adding any missing ones with their defaults
+    missing = {field: default for field, default in _EXPORT_DEFAULTS.items() if field not in bookings_df.columns}
+    df = bookings_df.assign(**missing)[list(_EXPORT_COLUMNS)].rename(columns=_EXPORT_COLUMNS)
+    return _df_to_csv(df)
+
+@st.cache_data(show_spinner=False)
+def _df_to_csv(df):
+    """Serialise a DataFrame to CSV in batches of rows; repeat exports of the same data hit the cache"""
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, chunksize=10_000)
+    return buf.getvalue()
+
+def _range_days(dates):
+    """Number of days (inclusive) spanned by a Series of parsed dates"""
+    ordinals = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    return int(ordinals.max() - ordinals.min()) + 1
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _parse_created_dates(created_dates):
+    """Parse raw ISO created dates in one call, shifted to Japan time like the display value"""
+    parsed = pd.to_datetime(
+        pd.Series(created_dates, dtype=object), format="ISO8601", utc=True, errors='coerce'
+    ).dropna()
+    return parsed.dt.tz_localize(None) + pd.offsets.Hour(9)
 
 def calculate_booking_rate(bookings):
     """Calculate booking rate based on actual booking date range"""
     if not bookings:
         return 0
     
-    # Try to get created dates first, then check-in dates as fallback
-    booking_dates = []
-    
-    # First try created dates (when the booking was made)
-    for booking in bookings:
-        created_date = booking.get('created_date', '')
-        if created_date:
-            try:
-                # Handle different date formats
-                if 'T' in created_date:
-                    # ISO format with time
-                    date_obj = pd.to_datetime(created_date).date()
-                else:
-                    # Date only format
-                    date_obj = pd.to_datetime(created_date).date()
-                booking_dates.append(date_obj)
-            except:
-                continue
+    # Try created dates first (when the booking was made)
+    booking_dates = _parse_created_dates(tuple(b.get('created_date_raw', '') for b in bookings))
     
     # If no created dates, fallback to check-in dates
-    if not booking_dates:
-        for booking in bookings:
-            checkin_date = booking.get('checkin_date_raw', '')
-            if checkin_date:
-                try:
-                    date_obj = pd.to_datetime(checkin_date).date()
-                    booking_dates.append(date_obj)
-                except:
-                    continue
+    if booking_dates.empty:
+        booking_dates = pd.to_datetime(
+            pd.Series([b.get('checkin_date_raw', '') for b in bookings]), errors='coerce'
+        ).dropna()
     
-    if not booking_dates:
+    if booking_dates.empty:
         return 0
     
-    # Calculate date range
-    min_date = min(booking_dates)
-    max_date = max(booking_dates)
-    
-    # If all bookings are on the same date
-    if min_date == max_date:
-        return len(bookings)  # All bookings in 1 day
-    
-    # Calculate days between min and max (inclusive)
-    date_range_days = (max_date - min_date).days + 1
+    # Days between min and max (inclusive); all bookings on the same date gives 1
+    date_range_days = _range_days(booking_dates)
     
     # Return bookings per day
     return len(bookings) / date_range_days
 
+# st.fragment needs Streamlit 1.37; on older releases the block simply runs with the page
+_fragment = getattr(st, "fragment", lambda func: func)
+
+@_fragment
+def _analytics_block(bookings):
+    """Analytics expander contents, rerun as a fragment independent of the page where supported"""
+    # Plotly is only needed once the expander has data to chart
+    import plotly.express as px
+    
+    # FILTER OUT CANCELLED BOOKINGS for analytics
+    active_bookings = [b for b in bookings if b.get('is_active', True)]
+    
+    # Country and channel tallies shared by the charts and Quick Insights
+    # UPDATED: Include bookings without country as "Unknown"
+    countries = []
+    for b in active_bookings:
+        country = b.get('country', '')
+        if country and country != 'N/A' and country.strip():
+            countries.append(country)
+        else:
+            countries.append('Unknown')
+    country_counts = pd.Series(countries).value_counts()
+    
+    booking_sources = [b.get('booking_source', 'Unknown') for b in active_bookings if b.get('booking_source')]
+    # Group staff bookings together
+    grouped_sources = [_group_source(source) for source in booking_sources]
+    source_counts = pd.Series(grouped_sources).value_counts()
+    
+    st.write(f"{len(active_bookings)} ACTIVE BOOKINGS ({len(bookings)} total including {len(bookings) - len(active_bookings)} cancelled)")
+    
+    # Key Metrics Row - USE ONLY ACTIVE BOOKINGS
+    st.subheader("Key Metrics")
+    col1, col2, col3, col4, col5, col6 = st.columns(6)  # CHANGED: Added 6th column
+    
+    # Calculate totals from ACTIVE bookings only
+    # Skip the price scan entirely when no booking carries a price
+    if any('sell_price_raw' in b for b in active_bookings):
+        prices = [_get_price(b) for b in active_bookings if 'sell_price_raw' in b]
+        prices = [p for p in prices if p > 0]
+    else:
+        prices = []
+    nights_data = [_get_nights(b) for b in active_bookings if 'nights' in b]
+    nights_data = [n for n in nights_data if n > 0]
+    total_gross = sum(prices)
+    total_nights = sum(nights_data)
+    total_bookings = len(active_bookings)  # Use active bookings count
+    avg_nights = total_nights / total_bookings if total_bookings > 0 else 0
+    
+    # ADDED: Calculate average cost per booking
+    avg_cost_per_booking = total_gross / len(prices) if len(prices) > 0 else 0
+    
+    # Calculate booking rate using active bookings only
+    filter_option = st.session_state.get("recent_filter_select_page", "7 days")
+    start_date = st.session_state.get("recent_start_date_page", None)
+    end_date = st.session_state.get("recent_end_date_page", None)
+
+    # Calculate days in period (same logic as main UI)
+    days_in_period = _days_in_period(filter_option, start_date, end_date)
+
+    # Calculate booking rate using ACTIVE bookings only
+    booking_rate = total_bookings / days_in_period if days_in_period > 0 else 0
+    
+    # Rest of metrics calculations using active_bookings...
+    with col1:
+        st.metric(
+            label="Total Gross Revenue",
+            value=f"${total_gross:,.2f}" if total_gross > 0 else "N/A",
+            help="Sum of all sell prices (active bookings only)"
+        )
+    
+    with col2:
+        st.metric(
+            label="Total Nights",
+            value=f"{total_nights:,}" if total_nights > 0 else "N/A",
+            help="Sum of all booking nights (active bookings only)"
+        )
+    
+    with col3:
+        st.metric(
+            label="Active Bookings",
+            value=f"{total_bookings:,}",
+            help="Number of active bookings in current filter"
+        )
+    
+    with col4:
+        st.metric(
+            label="Avg Nights/Booking",
+            value=f"{avg_nights:.1f}" if avg_nights > 0 else "N/A",
+            help="Average nights per active booking"
+        )
+    
+    with col5:
+        st.metric(
+            label="Booking Rate",
+            value=f"{booking_rate:.1f}/day" if booking_rate > 0 else "N/A",
+            help="Average active bookings per day"
+        )
+    
+    # ADDED: 6th metric column
+    with col6:
+        st.metric(
+            label="Avg Cost/Booking",
+            value=f"${avg_cost_per_booking:,.2f}" if avg_cost_per_booking > 0 else "N/A",
+            help="Average revenue per active booking with revenue"
+        )
+    
+    st.markdown("---")
+    
+    # Charts Row - USE ONLY ACTIVE BOOKINGS
+    col1, col2 = st.columns(2)
+    
+    # 1. COUNTRY BREAKDOWN - Use only active bookings, include those without country
+    with col1:
+        st.subheader("Country Breakdown")
+        if countries:
+            # Get top 8 countries
+            top_countries = country_counts.head(8)
+            
+            # Create properly sorted DataFrame for Plotly
+            chart_df = pd.DataFrame({
+                'Country': top_countries.index,
+                'Bookings': top_countries.values
+            })
+            
+            # Sort by bookings ascending (puts largest at top for horizontal bars)
+            chart_df = chart_df.sort_values('Bookings', ascending=True)
+            
+            # Create Plotly horizontal bar chart
+            fig = px.bar(
+                chart_df, 
+                x='Bookings', 
+                y='Country',
+                orientation='h',
+                height=220,
+                color_discrete_sequence=['#1f77b4']  # Streamlit blue
+            )
+            fig.update_layout(
+                margin=dict(l=0, r=0, t=0, b=0),
+                showlegend=False,
+                xaxis_title="",
+                yaxis_title=""
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # UPDATED: Summary stats with unknown count
+            total_countries = len(country_counts)
+            top_country = country_counts.index[0]
+            top_country_share = (country_counts.iloc[0] / len(countries)) * 100
+            unknown_count = country_counts.get('Unknown', 0)
+            if unknown_count > 0:
+                st.write(f"**{total_countries} countries** • Top: {top_country} ({top_country_share:.0f}%) • {unknown_count} Unknown")
+            else:
+                st.write(f"**{total_countries} countries** • Top: {top_country} ({top_country_share:.0f}%)")
+        else:
+            st.info("No country data available")
+    
+    # 2. BOOKING CHANNELS - Use only active bookings
+    with col2:
+        st.subheader("Booking Channels")
+        if booking_sources:
+            # Get top 6 channels
+            top_sources = source_counts.head(6)
+            
+            # Create properly sorted DataFrame for Plotly
+            chart_df = pd.DataFrame({
+                'Channel': top_sources.index,
+                'Bookings': top_sources.values
+            })
+            
+            # Sort by bookings ascending (puts largest at top for horizontal bars)
+            chart_df = chart_df.sort_values('Bookings', ascending=True)
+            
+            # Create Plotly horizontal bar chart
+            fig = px.bar(
+                chart_df, 
+                x='Bookings', 
+                y='Channel',
+                orientation='h',
+                height=220,
+                color_discrete_sequence=['#1f77b4']  # Streamlit blue
+            )
+            fig.update_layout(
+                margin=dict(l=0, r=0, t=0, b=0),
+                showlegend=False,
+                xaxis_title="",
+                yaxis_title=""
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Summary stats
+            total_channels = len(source_counts)
+            top_channel = source_counts.index[0]
+            top_channel_share = (source_counts.iloc[0] / len(grouped_sources)) * 100
+            st.write(f"**{total_channels} channels** • Top: {top_channel} ({top_channel_share:.0f}%)")
+        else:
+            st.info("No booking channel data available")
+    
+    # Second row of charts - USE ONLY ACTIVE BOOKINGS
+    col3, col4 = st.columns(2)
+    
+    # 3. NIGHTS DISTRIBUTION - Use only active bookings
+    with col3:
+        st.subheader("Nights Distribution")
+        if nights_data:
+            # Count nights and get top 10
+            night_counts = pd.Series(nights_data).value_counts().sort_index()
+            display_nights = night_counts.head(10)
+            
+            # Create properly sorted DataFrame for Plotly
+            chart_df = pd.DataFrame({
+                'Nights': display_nights.index.astype(str),  # Convert to string for proper display
+                'Bookings': display_nights.values
+            })
+            
+            # Sort by bookings ascending (puts largest at top for horizontal bars)
+            chart_df = chart_df.sort_values('Bookings', ascending=True)
+            
+            # Create Plotly horizontal bar chart
+            fig = px.bar(
+                chart_df, 
+                x='Bookings', 
+                y='Nights',
+                orientation='h',
+                height=220,
+                color_discrete_sequence=['#1f77b4']  # Streamlit blue
+            )
+            fig.update_layout(
+                margin=dict(l=0, r=0, t=0, b=0),
+                showlegend=False,
+                xaxis_title="",
+                yaxis_title=""
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Summary stats
+            avg_nights_calc = sum(nights_data) / len(nights_data)
+            most_common_nights = night_counts.idxmax()
+            st.write(f"**Avg: {avg_nights_calc:.1f} nights** • Most common: {most_common_nights} nights")
+        else:
+            st.info("No nights data available")
+    
+    # 4. REVENUE BY CHANNEL - Use only active bookings
+    with col4:
+        st.subheader("Revenue by Channel")
+        if booking_sources:
+            # Calculate revenue by booking source (with staff grouping) - ACTIVE BOOKINGS ONLY
+            revenue_by_source = {}
+            for booking in active_bookings:  # Changed from bookings to active_bookings
+                source = booking.get('booking_source', 'Unknown')
+                revenue = booking.get('sell_price_raw', 0)
+                if source and revenue > 0:
+                    # Group staff bookings together
+                    grouped_source = _group_source(source)
+                    revenue_by_source[grouped_source] = revenue_by_source.get(grouped_source, 0) + revenue
+            
+            if revenue_by_source:
+                # Create series and get top 6
+                revenue_series = pd.Series(revenue_by_source)
+                top_revenue = revenue_series.nlargest(6)
+                
+                # Create properly sorted DataFrame for Plotly
+                chart_df = pd.DataFrame({
+                    'Channel': top_revenue.index,
+                    'Revenue': top_revenue.values
+                })
+                
+                # Sort by revenue ascending (puts largest at top for horizontal bars)
+                chart_df = chart_df.sort_values('Revenue', ascending=True)
+                
+                # Create Plotly horizontal bar chart
+                fig = px.bar(
+                    chart_df, 
+                    x='Revenue', 
+                    y='Channel',
+                    orientation='h',
+                    height=220,
+                    color_discrete_sequence=['#1f77b4']  # Streamlit blue
+                )
+                fig.update_layout(
+                    margin=dict(l=0, r=0, t=0, b=0),
+                    showlegend=False,
+                    xaxis_title="",
+                    yaxis_title="",
+                    xaxis=dict(tickformat='$,.0f')  # Format x-axis to show currency
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                
+                # Summary stats
+                top_revenue_channel = revenue_series.idxmax()
+                top_revenue_amount = revenue_series.max()
+                top_revenue_share = (top_revenue_amount / total_gross) * 100 if total_gross > 0 else 0
+                st.write(f"**Top: {top_revenue_channel}** • ${top_revenue_amount:,.0f} ({top_revenue_share:.0f}%)")
+            else:
+                st.info("No revenue data by channel available")
+        else:
+            st.info("No booking channel data available")
+    
+    # Additional insights section - USE ONLY ACTIVE BOOKINGS
+    st.markdown("---")
+    st.subheader("Quick Insights")
+    
+    insights_col1, insights_col2 = st.columns(2)
+    
+    with insights_col1:
+        # Top performing metrics - ACTIVE BOOKINGS ONLY
+        if countries and booking_sources:
+            top_country = country_counts.index[0] if len(country_counts) > 0 else "N/A"
+            top_channel = source_counts.index[0] if len(source_counts) > 0 else "N/A"
+            
+            st.write("**Performance Highlights:**")
+            st.write(f"Top country: **{top_country}** ({country_counts.iloc[0]} bookings)")
+            st.write(f"Top channel: **{top_channel}** ({source_counts.iloc[0]} bookings)")
+            
+            if nights_data:
+                avg_revenue_per_night = (total_gross / total_nights) if total_nights > 0 else 0
+                st.write(f"Revenue per night: **${avg_revenue_per_night:.2f}**")
+            
+            if avg_cost_per_booking > 0:
+                st.write(f"Avg cost per booking: **${avg_cost_per_booking:.2f}**")
+    
+    with insights_col2:
+        # Diversity metrics - ACTIVE BOOKINGS ONLY
+        unique_countries = len(country_counts)
+        unique_channels = len(source_counts)
+        
+        st.write("**Market Diversity:**")
+        st.write(f"Countries represented: **{unique_countries}**")
+        st.write(f"Booking channels: **{unique_channels}**")
+        
+        if countries and len(country_counts) > 1:
+            # Calculate concentration (top country percentage)
+            top_country_concentration = (country_counts.iloc[0] / len(countries)) * 100
+            concentration_level = "High" if top_country_concentration > 50 else "Medium" if top_country_concentration > 30 else "Low"
+            st.write(f"Market concentration: **{concentration_level}** ({top_country_concentration:.1f}%)")
+
 def main():
     """Main function for the Recent Bookings page"""
     
@@ -133,379 +500,18 @@ def main():
     # Main recent bookings section with unpaid highlighting
     manager.display_recent_bookings_section(location="page")
     
+    # Read the filtered bookings once per rerun
+    bookings = st.session_state.get('filtered_bookings_data') or []
+    has_data = bool(bookings)
+    
     # Additional features section
     st.markdown("---")
     
     # In pages/2_📊_Recent_Bookings.py - Update the analytics section
     with st.expander("📈 Analytics", expanded=False):
         # Show summary of new fields if data is available
-        if hasattr(st.session_state, 'filtered_bookings_data') and st.session_state.filtered_bookings_data:
-            bookings = st.session_state.filtered_bookings_data
-            
-            # FILTER OUT CANCELLED BOOKINGS for analytics
-            active_bookings = [b for b in bookings if b.get('is_active', True)]
-            
-            st.write(f"{len(active_bookings)} ACTIVE BOOKINGS ({len(bookings)} total including {len(bookings) - len(active_bookings)} cancelled)")
-            
-            # Key Metrics Row - USE ONLY ACTIVE BOOKINGS
-            st.subheader("Key Metrics")
-            col1, col2, col3, col4, col5, col6 = st.columns(6)  # CHANGED: Added 6th column
-            
-            # Calculate totals from ACTIVE bookings only
-            total_gross = sum(b.get('sell_price_raw', 0) for b in active_bookings if b.get('sell_price_raw', 0) > 0)
-            total_nights = sum(b.get('nights', 0) for b in active_bookings if b.get('nights', 0) > 0)
-            total_bookings = len(active_bookings)  # Use active bookings count
-            avg_nights = total_nights / total_bookings if total_bookings > 0 else 0
-            
-            # ADDED: Calculate average cost per booking
-            bookings_with_revenue = [b for b in active_bookings if b.get('sell_price_raw', 0) > 0]
-            avg_cost_per_booking = total_gross / len(bookings_with_revenue) if len(bookings_with_revenue) > 0 else 0
-            
-            # Calculate booking rate using active bookings only
-            filter_option = st.session_state.get("recent_filter_select_page", "7 days")
-            start_date = st.session_state.get("recent_start_date_page", None)
-            end_date = st.session_state.get("recent_end_date_page", None)
-
-            # Calculate days in period (same logic as main UI)
-            if filter_option == "Last 24 hours":
-                days_in_period = 1
-            elif filter_option == "2 days":
-                days_in_period = 2
-            elif filter_option == "3 days":
-                days_in_period = 3
-            elif filter_option == "5 days":
-                days_in_period = 5
-            elif filter_option == "7 days":
-                days_in_period = 7
-            elif filter_option == "14 days":
-                days_in_period = 14
-            elif filter_option == "Month to Date":
-                today = datetime.date.today()
-                month_start = today.replace(day=1)
-                days_in_period = (today - month_start).days + 1
-            elif filter_option == "Custom" and start_date and end_date:
-                delta = end_date - start_date
-                days_in_period = delta.days + 1
-            else:
-                days_in_period = 7  # Default fallback
-
-            # Calculate booking rate using ACTIVE bookings only
-            booking_rate = total_bookings / days_in_period if days_in_period > 0 else 0
-            
-            # Rest of metrics calculations using active_bookings...
-            with col1:
-                st.metric(
-                    label="Total Gross Revenue",
-                    value=f"${total_gross:,.2f}" if total_gross > 0 else "N/A",
-                    help="Sum of all sell prices (active bookings only)"
-                )
-            
-            with col2:
-                st.metric(
-                    label="Total Nights",
-                    value=f"{total_nights:,}" if total_nights > 0 else "N/A",
-                    help="Sum of all booking nights (active bookings only)"
-                )
-            
-            with col3:
-                st.metric(
-                    label="Active Bookings",
-                    value=f"{total_bookings:,}",
-                    help="Number of active bookings in current filter"
-                )
-            
-            with col4:
-                st.metric(
-                    label="Avg Nights/Booking",
-                    value=f"{avg_nights:.1f}" if avg_nights > 0 else "N/A",
-                    help="Average nights per active booking"
-                )
-            
-            with col5:
-                st.metric(
-                    label="Booking Rate",
-                    value=f"{booking_rate:.1f}/day" if booking_rate > 0 else "N/A",
-                    help="Average active bookings per day"
-                )
-            
-            # ADDED: 6th metric column
-            with col6:
-                st.metric(
-                    label="Avg Cost/Booking",
-                    value=f"${avg_cost_per_booking:,.2f}" if avg_cost_per_booking > 0 else "N/A",
-                    help="Average revenue per active booking with revenue"
-                )
-            
-            st.markdown("---")
-            
-            # Charts Row - USE ONLY ACTIVE BOOKINGS
-            col1, col2 = st.columns(2)
-            
-            # 1. COUNTRY BREAKDOWN - Use only active bookings, include those without country
-            with col1:
-                st.subheader("Country Breakdown")
-                # UPDATED: Include bookings without country as "Unknown"
-                countries = []
-                for b in active_bookings:
-                    country = b.get('country', '')
-                    if country and country != 'N/A' and country.strip():
-                        countries.append(country)
-                    else:
-                        countries.append('Unknown')
-                
-                if countries:
-                    country_counts = pd.Series(countries).value_counts()
-                    
-                    # Get top 8 countries
-                    top_countries = country_counts.head(8)
-                    
-                    # Create properly sorted DataFrame for Plotly
-                    chart_df = pd.DataFrame({
-                        'Country': top_countries.index,
-                        'Bookings': top_countries.values
-                    })
-                    
-                    # Sort by bookings ascending (puts largest at top for horizontal bars)
-                    chart_df = chart_df.sort_values('Bookings', ascending=True)
-                    
-                    # Create Plotly horizontal bar chart
-                    fig = px.bar(
-                        chart_df, 
-                        x='Bookings', 
-                        y='Country',
-                        orientation='h',
-                        height=220,
-                        color_discrete_sequence=['#1f77b4']  # Streamlit blue
-                    )
-                    fig.update_layout(
-                        margin=dict(l=0, r=0, t=0, b=0),
-                        showlegend=False,
-                        xaxis_title="",
-                        yaxis_title=""
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # UPDATED: Summary stats with unknown count
-                    total_countries = len(set(countries))
-                    top_country = country_counts.index[0]
-                    top_country_share = (country_counts.iloc[0] / len(countries)) * 100
-                    unknown_count = country_counts.get('Unknown', 0)
-                    if unknown_count > 0:
-                        st.write(f"**{total_countries} countries** • Top: {top_country} ({top_country_share:.0f}%) • {unknown_count} Unknown")
-                    else:
-                        st.write(f"**{total_countries} countries** • Top: {top_country} ({top_country_share:.0f}%)")
-                else:
-                    st.info("No country data available")
-            
-            # 2. BOOKING CHANNELS - Use only active bookings
-            with col2:
-                st.subheader("Booking Channels")
-                booking_sources = [b.get('booking_source', 'Unknown') for b in active_bookings if b.get('booking_source')]
-                if booking_sources:
-                    # Group staff bookings together
-                    grouped_sources = []
-                    for source in booking_sources:
-                        if 'staff' in source.lower() or source.lower().startswith('staff'):
-                            grouped_sources.append('Staff')
-                        else:
-                            grouped_sources.append(source)
-                    
-                    source_counts = pd.Series(grouped_sources).value_counts()
-                    
-                    # Get top 6 channels
-                    top_sources = source_counts.head(6)
-                    
-                    # Create properly sorted DataFrame for Plotly
-                    chart_df = pd.DataFrame({
-                        'Channel': top_sources.index,
-                        'Bookings': top_sources.values
-                    })
-                    
-                    # Sort by bookings ascending (puts largest at top for horizontal bars)
-                    chart_df = chart_df.sort_values('Bookings', ascending=True)
-                    
-                    # Create Plotly horizontal bar chart
-                    fig = px.bar(
-                        chart_df, 
-                        x='Bookings', 
-                        y='Channel',
-                        orientation='h',
-                        height=220,
-                        color_discrete_sequence=['#1f77b4']  # Streamlit blue
-                    )
-                    fig.update_layout(
-                        margin=dict(l=0, r=0, t=0, b=0),
-                        showlegend=False,
-                        xaxis_title="",
-                        yaxis_title=""
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Summary stats
-                    total_channels = len(set(grouped_sources))
-                    top_channel = source_counts.index[0]
-                    top_channel_share = (source_counts.iloc[0] / len(grouped_sources)) * 100
-                    st.write(f"**{total_channels} channels** • Top: {top_channel} ({top_channel_share:.0f}%)")
-                else:
-                    st.info("No booking channel data available")
-            
-            # Second row of charts - USE ONLY ACTIVE BOOKINGS
-            col3, col4 = st.columns(2)
-            
-            # 3. NIGHTS DISTRIBUTION - Use only active bookings
-            with col3:
-                st.subheader("Nights Distribution")
-                nights_data = [b.get('nights', 0) for b in active_bookings if b.get('nights', 0) > 0]
-                if nights_data:
-                    # Count nights and get top 10
-                    night_counts = pd.Series(nights_data).value_counts().sort_index()
-                    display_nights = night_counts.head(10)
-                    
-                    # Create properly sorted DataFrame for Plotly
-                    chart_df = pd.DataFrame({
-                        'Nights': display_nights.index.astype(str),  # Convert to string for proper display
-                        'Bookings': display_nights.values
-                    })
-                    
-                    # Sort by bookings ascending (puts largest at top for horizontal bars)
-                    chart_df = chart_df.sort_values('Bookings', ascending=True)
-                    
-                    # Create Plotly horizontal bar chart
-                    fig = px.bar(
-                        chart_df, 
-                        x='Bookings', 
-                        y='Nights',
-                        orientation='h',
-                        height=220,
-                        color_discrete_sequence=['#1f77b4']  # Streamlit blue
-                    )
-                    fig.update_layout(
-                        margin=dict(l=0, r=0, t=0, b=0),
-                        showlegend=False,
-                        xaxis_title="",
-                        yaxis_title=""
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Summary stats
-                    avg_nights_calc = sum(nights_data) / len(nights_data)
-                    most_common_nights = night_counts.idxmax()
-                    st.write(f"**Avg: {avg_nights_calc:.1f} nights** • Most common: {most_common_nights} nights")
-                else:
-                    st.info("No nights data available")
-            
-            # 4. REVENUE BY CHANNEL - Use only active bookings
-            with col4:
-                st.subheader("Revenue by Channel")
-                if booking_sources:
-                    # Calculate revenue by booking source (with staff grouping) - ACTIVE BOOKINGS ONLY
-                    revenue_by_source = {}
-                    for booking in active_bookings:  # Changed from bookings to active_bookings
-                        source = booking.get('booking_source', 'Unknown')
-                        revenue = booking.get('sell_price_raw', 0)
-                        if source and revenue > 0:
-                            # Group staff bookings together
-                            if 'staff' in source.lower() or source.lower().startswith('staff'):
-                                grouped_source = 'Staff'
-                            else:
-                                grouped_source = source
-                            revenue_by_source[grouped_source] = revenue_by_source.get(grouped_source, 0) + revenue
-                    
-                    if revenue_by_source:
-                        # Create series and get top 6
-                        revenue_series = pd.Series(revenue_by_source)
-                        top_revenue = revenue_series.nlargest(6)
-                        
-                        # Create properly sorted DataFrame for Plotly
-                        chart_df = pd.DataFrame({
-                            'Channel': top_revenue.index,
-                            'Revenue': top_revenue.values
-                        })
-                        
-                        # Sort by revenue ascending (puts largest at top for horizontal bars)
-                        chart_df = chart_df.sort_values('Revenue', ascending=True)
-                        
-                        # Create Plotly horizontal bar chart
-                        fig = px.bar(
-                            chart_df, 
-                            x='Revenue', 
-                            y='Channel',
-                            orientation='h',
-                            height=220,
-                            color_discrete_sequence=['#1f77b4']  # Streamlit blue
-                        )
-                        fig.update_layout(
-                            margin=dict(l=0, r=0, t=0, b=0),
-                            showlegend=False,
-                            xaxis_title="",
-                            yaxis_title="",
-                            xaxis=dict(tickformat='$,.0f')  # Format x-axis to show currency
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Summary stats
-                        top_revenue_channel = revenue_series.idxmax()
-                        top_revenue_amount = revenue_series.max()
-                        top_revenue_share = (top_revenue_amount / total_gross) * 100 if total_gross > 0 else 0
-                        st.write(f"**Top: {top_revenue_channel}** • ${top_revenue_amount:,.0f} ({top_revenue_share:.0f}%)")
-                    else:
-                        st.info("No revenue data by channel available")
-                else:
-                    st.info("No booking channel data available")
-            
-            # Additional insights section - USE ONLY ACTIVE BOOKINGS
-            st.markdown("---")
-            st.subheader("Quick Insights")
-            
-            insights_col1, insights_col2 = st.columns(2)
-            
-            with insights_col1:
-                # Top performing metrics - ACTIVE BOOKINGS ONLY
-                if countries and booking_sources:
-                    country_counts = pd.Series(countries).value_counts().sort_values(ascending=False)
-                    grouped_sources = []
-                    for source in booking_sources:
-                        if 'staff' in source.lower() or source.lower().startswith('staff'):
-                            grouped_sources.append('Staff')
-                        else:
-                            grouped_sources.append(source)
-                    source_counts = pd.Series(grouped_sources).value_counts().sort_values(ascending=False)
-                    
-                    top_country = country_counts.index[0] if len(country_counts) > 0 else "N/A"
-                    top_channel = source_counts.index[0] if len(source_counts) > 0 else "N/A"
-                    
-                    st.write("**Performance Highlights:**")
-                    st.write(f"Top country: **{top_country}** ({country_counts.iloc[0]} bookings)")
-                    st.write(f"Top channel: **{top_channel}** ({source_counts.iloc[0]} bookings)")
-                    
-                    if nights_data:
-                        avg_revenue_per_night = (total_gross / total_nights) if total_nights > 0 else 0
-                        st.write(f"Revenue per night: **${avg_revenue_per_night:.2f}**")
-                    
-                    if avg_cost_per_booking > 0:
-                        st.write(f"Avg cost per booking: **${avg_cost_per_booking:.2f}**")
-            
-            with insights_col2:
-                # Diversity metrics - ACTIVE BOOKINGS ONLY
-                unique_countries = len(set(countries)) if countries else 0
-                grouped_sources = []
-                for source in booking_sources:
-                    if 'staff' in source.lower() or source.lower().startswith('staff'):
-                        grouped_sources.append('Staff')
-                    else:
-                        grouped_sources.append(source)
-                unique_channels = len(set(grouped_sources)) if grouped_sources else 0
-                
-                st.write("**Market Diversity:**")
-                st.write(f"Countries represented: **{unique_countries}**")
-                st.write(f"Booking channels: **{unique_channels}**")
-                
-                if countries and len(country_counts) > 1:
-                    # Calculate concentration (top country percentage)
-                    top_country_concentration = (country_counts.iloc[0] / len(countries)) * 100
-                    concentration_level = "High" if top_country_concentration > 50 else "Medium" if top_country_concentration > 30 else "Low"
-                    st.write(f"Market concentration: **{concentration_level}** ({top_country_concentration:.1f}%)")
-        
+        if has_data:
+            _analytics_block(bookings)
         else:
             # Show placeholder when no data
             col1, col2 = st.columns(2)
@@ -541,8 +547,8 @@ def main():
         
         # Enhanced CSV export with new fields
         if st.button("Export Enhanced CSV", use_container_width=True):
-            if hasattr(st.session_state, 'filtered_bookings_data') and st.session_state.filtered_bookings_data:
-                csv_data = create_enhanced_csv_export(st.session_state.filtered_bookings_data)
+            if has_data:
+                csv_data = create_enhanced_csv_export(st.session_state.get('filtered_bookings_df'))
                 if csv_data:
                     st.download_button(
                         label="📥 Download Enhanced CSV",
@@ -574,13 +580,16 @@ def main():
         
         # Data preview for new fields
         st.subheader("📊 Enhanced Data Preview")
-        if hasattr(st.session_state, 'filtered_bookings_data') and st.session_state.filtered_bookings_data:
-            bookings = st.session_state.filtered_bookings_data
-            
+        if has_data:
             # Show summary of new fields
-            total_nights = sum(b.get('nights', 0) for b in bookings if b.get('nights', 0) > 0)
-            unique_countries = len(set(b.get('country', 'N/A') for b in bookings if b.get('country') != 'N/A'))
-            avg_nights = total_nights / len([b for b in bookings if b.get('nights', 0) > 0]) if any(b.get('nights', 0) > 0 for b in bookings) else 0
+            bookings_df = st.session_state.filtered_bookings_df
+            nights = bookings_df['nights'] if 'nights' in bookings_df.columns else pd.Series(dtype=float)
+            stay_nights = nights[nights > 0]
+            total_nights = int(stay_nights.sum())
+            countries = [b.get('country', 'Unknown') for b in bookings if b.get('country') != 'N/A']
+            country_counts = pd.Series(countries).value_counts()
+            unique_countries = len(country_counts)
+            avg_nights = stay_nights.mean() if not stay_nights.empty else 0
             
             st.metric("Total Nights", total_nights)
             st.metric("Unique Countries", unique_countries)
@@ -588,13 +597,9 @@ def main():
             
             # Show booking rate calculation details
             filter_option = st.session_state.get("recent_filter_select_page", "7 days")
-            start_date = st.session_state.get("recent_start_date_page", None)
-            end_date = st.session_state.get("recent_end_date_page", None)
 
             if filter_option == "Month to Date":
-                today = datetime.date.today()
-                month_start = today.replace(day=1)
-                days_in_period = (today - month_start).days + 1
+                days_in_period = _days_in_period(filter_option)
                 booking_rate = len(bookings) / days_in_period if days_in_period > 0 else 0
             else:
                 booking_rate = calculate_booking_rate(bookings)
@@ -602,22 +607,10 @@ def main():
             st.metric("Booking Rate", f"{booking_rate:.1f}/day")
             
             # Show date range being used for booking rate
-            booking_dates = []
-            for booking in bookings:
-                created_date = booking.get('created_date', '')
-                if created_date:
-                    try:
-                        if 'T' in created_date:
-                            date_obj = pd.to_datetime(created_date).date()
-                        else:
-                            date_obj = pd.to_datetime(created_date).date()
-                        booking_dates.append(date_obj)
-                    except:
-                        continue
-            
-            if booking_dates:
-                min_date = min(booking_dates)
-                max_date = max(booking_dates)
+            booking_dates = _parse_created_dates(tuple(b.get('created_date_raw', '') for b in bookings))
+            if not booking_dates.empty:
+                min_date = booking_dates.min().date()
+                max_date = booking_dates.max().date()
                 date_range_days = (max_date - min_date).days + 1
                 st.write(f"**Rate Period:** {min_date} to {max_date} ({date_range_days} days)")
             
@@ -625,20 +618,18 @@ def main():
             checkin_dates = [b.get('checkin_date_raw', '') for b in bookings if b.get('checkin_date_raw')]
             if checkin_dates:
                 try:
-                    dates = [pd.to_datetime(d) for d in checkin_dates if d]
-                    if dates:
-                        earliest = min(dates).strftime('%Y-%m-%d')
-                        latest = max(dates).strftime('%Y-%m-%d')
+                    dates = pd.to_datetime(pd.Series(checkin_dates), errors='coerce').dropna()
+                    if not dates.empty:
+                        earliest = dates.min().strftime('%Y-%m-%d')
+                        latest = dates.max().strftime('%Y-%m-%d')
                         st.write(f"**Check-in Range:**")
                         st.write(f"{earliest} to {latest}")
                 except:
                     st.write("**Check-in dates:** Available")
             
             # Country distribution pie chart
-            countries = [b.get('country', 'Unknown') for b in bookings if b.get('country') != 'N/A']
-            if len(set(countries)) > 1:
+            if len(country_counts) > 1:
                 st.write("**Country Distribution:**")
-                country_counts = pd.Series(countries).value_counts()
                 for country, count in country_counts.head(3).items():
                     st.write(f"• {country}: {count}")
                 if len(country_counts) > 3:
@@ -664,7 +655,7 @@ def main():
             - Check-in: `items[0].checkIn`
             - Nights: Calculated from check-in/out dates
             - Country: `leadGuest.nationality`
-            - Booking Rate: Uses `created_date` or `checkin_date_raw`
+            - Booking Rate: Uses `created_date_raw` or `checkin_date_raw`
             """)
 
 if __name__ == "__main__":
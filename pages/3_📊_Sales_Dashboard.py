@@ -1,8 +1,8 @@
 import os
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # Set page config FIRST (required for multi-page apps)
@@ -10,6 +10,7 @@ st.set_page_config(page_title="Holiday Niseko Analytics Dashboard", layout="wide
 
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
 from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest,
     DateRange,
     Dimension,
     Metric,
@@ -48,16 +49,32 @@ except Exception as e:
     except Exception as env_error:
         pass
 
-def get_weekly_data_with_comparison(property_id=ga4_prop_id, weeks_back=12):
-    """Get extended period of data with year-over-year comparison"""
+# Friendly names for common GA4 source / medium values
+SOURCE_NAMES = {
+    "(direct) / (none)": "Direct",
+    "google / organic": "Google Search",
+    "google / cpc": "Google Ads",
+}
+
+@st.cache_resource
+def _get_ga_client():
+    """Shared GA4 client, created once per process (the gRPC client is thread-safe)"""
+    if GA4_CREDENTIALS:
+        return BetaAnalyticsDataClient(credentials=GA4_CREDENTIALS)
+    return BetaAnalyticsDataClient()
+
+def _metric_column(rows, index, dtype):
+    """Read one metric from GA4 report rows into a NumPy column"""
+    return np.fromiter((row.metric_values[index].value for row in rows), dtype=dtype, count=len(rows))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_weekly_data_with_comparison(property_id, weeks_back=12):
+    """Get extended period of data with year-over-year comparison (cached for 5 minutes)"""
     
     if not property_id:
         raise Exception("GA4 property ID not configured.")
     
-    if GA4_CREDENTIALS:
-        client = BetaAnalyticsDataClient(credentials=GA4_CREDENTIALS)
-    else:
-        client = BetaAnalyticsDataClient()
+    client = _get_ga_client()
     
     # Calculate extended period - current year
     today = datetime.now()
@@ -68,9 +85,8 @@ def get_weekly_data_with_comparison(property_id=ga4_prop_id, weeks_back=12):
     last_year_start = (today - timedelta(days=(weeks_back * 7) + 365)).strftime("%Y-%m-%d")
     last_year_end = (today - timedelta(days=1 + 365)).strftime("%Y-%m-%d")
     
-    def get_period_data(start_date, end_date, period_name):
-        request = RunReportRequest(
-            property=f"properties/{property_id}",
+    def period_request(start_date, end_date):
+        return RunReportRequest(
             dimensions=[Dimension(name="date")],
             metrics=[
                 Metric(name="activeUsers"),
@@ -81,42 +97,39 @@ def get_weekly_data_with_comparison(property_id=ga4_prop_id, weeks_back=12):
             ],
             date_ranges=[DateRange(start_date=start_date, end_date=end_date)]
         )
-        
-        response = client.run_report(request)
-        
-        data = []
-        for row in response.rows:
-            date = datetime.strptime(row.dimension_values[0].value, "%Y%m%d")
-            
-            data.append({
-                'date': date,
-                'period': period_name,
-                'users': int(row.metric_values[0].value),
-                'pageviews': int(row.metric_values[1].value),
-                'sessions': int(row.metric_values[2].value),
-                'duration': float(row.metric_values[3].value),
-                'engagement': float(row.metric_values[4].value) * 100
-            })
-        
-        return data
     
-    # Get both periods
-    current_data = get_period_data(current_start, current_end, "This Year")
-    last_year_data = get_period_data(last_year_start, last_year_end, "Last Year")
+    # Fetch both periods in a single round trip
+    response = client.batch_run_reports(BatchRunReportsRequest(
+        property=f"properties/{property_id}",
+        requests=[
+            period_request(current_start, current_end),
+            period_request(last_year_start, last_year_end)
+        ]
+    ))
     
-    # Combine data
-    all_data = current_data + last_year_data
-    df = pd.DataFrame(all_data)
+    # Build each period column-wise straight from the report rows
+    frames = []
+    for report, period_name in zip(response.reports, ("This Year", "Last Year")):
+        rows = report.rows
+        frames.append(pd.DataFrame({
+            'date': pd.to_datetime([row.dimension_values[0].value for row in rows], format="%Y%m%d"),
+            'period': period_name,
+            'users': _metric_column(rows, 0, np.int64),
+            'pageviews': _metric_column(rows, 1, np.int64),
+            'sessions': _metric_column(rows, 2, np.int64),
+            'duration': _metric_column(rows, 3, np.float64),
+            'engagement': _metric_column(rows, 4, np.float64) * 100
+        }))
+    
+    df = pd.concat(frames, ignore_index=True)
     
     return df, current_start, current_end
 
-def get_traffic_sources(property_id=ga4_prop_id, weeks_back=12):
-    """Get traffic sources for the specified period"""
+@st.cache_data(ttl=300, show_spinner=False)
+def get_traffic_sources(property_id, weeks_back=12):
+    """Get traffic sources for the specified period (cached for 5 minutes)"""
     
-    if GA4_CREDENTIALS:
-        client = BetaAnalyticsDataClient(credentials=GA4_CREDENTIALS)
-    else:
-        client = BetaAnalyticsDataClient()
+    client = _get_ga_client()
     
     today = datetime.now()
     start_date = (today - timedelta(days=weeks_back * 7)).strftime("%Y-%m-%d")
@@ -131,24 +144,49 @@ def get_traffic_sources(property_id=ga4_prop_id, weeks_back=12):
     
     response = client.run_report(request)
     
-    traffic_data = []
-    for row in response.rows:
-        source = row.dimension_values[0].value
-        # Clean up source names
-        if source == "(direct) / (none)":
-            source = "Direct"
-        elif source == "google / organic":
-            source = "Google Search"
-        elif source == "google / cpc":
-            source = "Google Ads"
-        
-        traffic_data.append({
-            'source': source,
-            'users': int(row.metric_values[0].value),
-            'sessions': int(row.metric_values[1].value)
-        })
+    rows = response.rows
+    traffic_df = pd.DataFrame({
+        'source': [row.dimension_values[0].value for row in rows],
+        'users': _metric_column(rows, 0, np.int64),
+        'sessions': _metric_column(rows, 1, np.int64)
+    })
+    
+    # Clean up source names
+    traffic_df['source'] = traffic_df['source'].map(SOURCE_NAMES).fillna(traffic_df['source'])
     
-    return pd.DataFrame(traffic_data)
+    return traffic_df
+
+@st.cache_data(show_spinner=False)
+def build_weekly(df):
+    """Aggregate daily data into complete weeks for each period
+    
+    Returns (current_weekly, last_year_weekly), with last year's weeks shifted
+    forward 365 days so both periods overlay on the same timeline.
+    """
+    # Label each day with the calendar week it falls in
+    df = df.assign(week_start=df['date'].dt.to_period('W').dt.start_time)
+    
+    # Aggregate both periods by week in one pass
+    weekly = df.groupby(['period', 'week_start']).agg(
+        users=('users', 'sum'),
+        pageviews=('pageviews', 'sum'),
+        sessions=('sessions', 'sum'),
+        engagement=('engagement', 'mean'),
+        days_in_week=('date', 'count')
+    ).reset_index()
+    
+    # Split by period and filter out incomplete weeks
+    complete = weekly['days_in_week'].to_numpy() >= 6
+    is_current = weekly['period'].to_numpy() == 'This Year'
+    current_weekly = weekly.loc[is_current & complete]
+    last_year_weekly = weekly.loc[~is_current & complete]
+    
+    # Shift last year dates forward by 365 days to overlay on same timeline
+    last_year_weekly = last_year_weekly.assign(
+        week_start=last_year_weekly['week_start'].to_numpy() + np.timedelta64(365, 'D')
+    )
+    
+    return current_weekly, last_year_weekly
 
 def main():
     st.title("Holiday Niseko Analytics")
@@ -176,45 +214,25 @@ def main():
     
     weeks_back = period_options[selected_period]
     
+    with col2:
+        if st.button("🔄 Refresh", help="Fetch fresh data from GA4"):
+            get_weekly_data_with_comparison.clear()
+            get_traffic_sources.clear()
+    
     try:
         # Get data
         with st.spinner("Loading..."):
-            df, start_date, end_date = get_weekly_data_with_comparison(weeks_back=weeks_back)
-            traffic_df = get_traffic_sources(weeks_back=weeks_back)
-        
-        # Create proper date labels for overlaid comparison
-        df_current = df[df['period'] == 'This Year'].copy()
-        df_last_year = df[df['period'] == 'Last Year'].copy()
+            # The two reports are independent, so overlap their network round trips
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                weekly_future = executor.submit(get_weekly_data_with_comparison, ga4_prop_id, weeks_back=weeks_back)
+                traffic_future = executor.submit(get_traffic_sources, ga4_prop_id, weeks_back=weeks_back)
+                df, start_date, end_date = weekly_future.result()
+                traffic_df = traffic_future.result()
         
-        # Group by week and get the actual calendar dates for this year
-        df_current['week_start'] = df_current['date'].dt.to_period('W').dt.start_time
-        df_last_year['week_start'] = df_last_year['date'].dt.to_period('W').dt.start_time
+        current_weekly, last_year_weekly = build_weekly(df)
         
-        # Aggregate by week and filter out incomplete weeks
-        current_weekly = df_current.groupby('week_start').agg({
-            'users': 'sum',
-            'pageviews': 'sum',
-            'sessions': 'sum',
-            'engagement': 'mean',
-            'date': 'count'
-        }).reset_index()
-        current_weekly.rename(columns={'date': 'days_in_week'}, inplace=True)
-        current_weekly = current_weekly[current_weekly['days_in_week'] >= 6]
-        
-        last_year_weekly = df_last_year.groupby('week_start').agg({
-            'users': 'sum',
-            'pageviews': 'sum',
-            'sessions': 'sum',
-            'engagement': 'mean',
-            'date': 'count'
-        }).reset_index()
-        last_year_weekly.rename(columns={'date': 'days_in_week'}, inplace=True)
-        last_year_weekly = last_year_weekly[last_year_weekly['days_in_week'] >= 6]
-        
-        # Shift last year dates forward by 365 days to overlay on same timeline
-        last_year_weekly['week_start'] = last_year_weekly['week_start'] + pd.DateOffset(days=365)
-        
-        # Weekly trends with proper overlay
+        # Weekly trends with proper overlay; Plotly is only loaded once GA4 is configured
+        import plotly.graph_objects as go
         from plotly.subplots import make_subplots
         
         fig_trends = make_subplots(
@@ -238,7 +256,7 @@ def main():
         for metric, row, col in metrics_data:
             # This year data
             fig_trends.add_trace(
-                go.Scatter(
+                go.Scattergl(
                     x=current_weekly['week_start'],
                     y=current_weekly[metric],
                     mode='lines+markers',
@@ -252,7 +270,7 @@ def main():
             
             # Last year data (shifted to overlay)
             fig_trends.add_trace(
-                go.Scatter(
+                go.Scattergl(
                     x=last_year_weekly['week_start'],
                     y=last_year_weekly[metric],
                     mode='lines+markers',
@@ -313,7 +331,9 @@ def main():
                 y=1.02,
                 xanchor="center",
                 x=0.5
-            )
+            ),
+            transition={'duration': 0},  # No redraw animation on rerun
+            uirevision='trend-v1'  # Keep zoom/pan state across reruns
         )
         
         # Update all subplot axes with clean look and better date formatting
@@ -354,28 +374,22 @@ def main():
             'engagement': 'mean'
         })
         
-        def calculate_change(current, last_year):
-            if last_year == 0:
-                return 0
-            return ((current - last_year) / last_year) * 100
+        # Year-over-year % change for every metric at once (0 where last year is 0)
+        changes = ((current_totals - last_year_totals) / last_year_totals.replace(0, np.nan) * 100).fillna(0)
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            change = calculate_change(current_totals['users'], last_year_totals['users'])
-            st.metric("Users", f"{current_totals['users']:,.0f}", f"{change:+.1f}%")
+            st.metric("Users", f"{current_totals['users']:,.0f}", f"{changes['users']:+.1f}%")
         
         with col2:
-            change = calculate_change(current_totals['pageviews'], last_year_totals['pageviews'])
-            st.metric("Page Views", f"{current_totals['pageviews']:,.0f}", f"{change:+.1f}%")
+            st.metric("Page Views", f"{current_totals['pageviews']:,.0f}", f"{changes['pageviews']:+.1f}%")
         
         with col3:
-            change = calculate_change(current_totals['sessions'], last_year_totals['sessions'])
-            st.metric("Sessions", f"{current_totals['sessions']:,.0f}", f"{change:+.1f}%")
+            st.metric("Sessions", f"{current_totals['sessions']:,.0f}", f"{changes['sessions']:+.1f}%")
         
         with col4:
-            change = calculate_change(current_totals['engagement'], last_year_totals['engagement'])
-            st.metric("Engagement", f"{current_totals['engagement']:.1f}%", f"{change:+.1f}%")
+            st.metric("Engagement", f"{current_totals['engagement']:.1f}%", f"{changes['engagement']:+.1f}%")
         
         # Traffic Sources
         st.subheader("Traffic Sources")
@@ -404,7 +418,8 @@ def main():
                     height=300,
                     margin=dict(l=20, r=20, t=20, b=20),
                     plot_bgcolor='white',
-                    paper_bgcolor='white'
+                    paper_bgcolor='white',
+                    transition={'duration': 0}
                 )
                 
                 st.plotly_chart(fig_pie, use_container_width=True, config={'displayModeBar': False})
@@ -2,6 +2,7 @@
 # pages/4_📅_Upcoming_Arrivals.py
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
 from datetime import datetime, timedelta
 from services.holiday_niseko_api import HolidayNisekoAPI
 from utils.normalize_upcoming_arrivals import normalize_upcoming_arrivals
@@ -10,59 +11,143 @@ st.set_page_config(page_title="Upcoming Arrivals", page_icon="🏂", layout="wid
 
 st.title("Upcoming Arrivals")
 
-# Initialize API
-try:
-    api = HolidayNisekoAPI(
-        username=st.secrets["hn_username"],
-        password=st.secrets["hn_password"]
-    )
-except:
+@st.cache_resource
+def get_hn_api():
+    """HolidayNisekoAPI client shared across reruns so its session and connection pool are reused"""
     try:
-        api = HolidayNisekoAPI(
-            username=st.secrets["username"],
-            password=st.secrets["password"]
+        return HolidayNisekoAPI(
+            username=st.secrets["hn_username"],
+            password=st.secrets["hn_password"]
         )
     except:
-        api = HolidayNisekoAPI(
-            username=st.secrets["holidayniseko"]["USERNAME"],
-            password=st.secrets["holidayniseko"]["PASSWORD"]
-        )
+        try:
+            return HolidayNisekoAPI(
+                username=st.secrets["username"],
+                password=st.secrets["password"]
+            )
+        except:
+            return HolidayNisekoAPI(
+                username=st.secrets["holidayniseko"]["USERNAME"],
+                password=st.secrets["holidayniseko"]["PASSWORD"]
+            )
+
+# Initialize API
+api = get_hn_api()
+
+ARROW_DATE = pd.ArrowDtype(pa.date32())
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_arrivals(_api, clean_date: str) -> pd.DataFrame:
+    """Active bookings arriving on clean_date (YYYYMMDD) as a normalized DataFrame, cached for 5 minutes"""
+    # Let API failures raise so st.cache_data never stores an empty or partial list
+    bookings = _api.get_all_bookings(params={"date": clean_date}, raise_errors=True)
+    # Drop inactive bookings before normalizing so their items and invoices are never expanded
+    bookings = [b for b in bookings if b.get("active") != 0]
+    if not bookings:
+        return pd.DataFrame()
+    
+    # Arrow-backed columns, with arrival/departure as calendar dates
+    df = normalize_upcoming_arrivals(bookings).convert_dtypes(dtype_backend="pyarrow")
+    return df.astype({c: ARROW_DATE for c in ("arrival_date", "departure_date") if c in df.columns})
+
+@st.cache_data(show_spinner=False)
+def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV download payload, cached so reruns on the same arrivals reuse it"""
+    return df.to_csv(index=False).encode('utf-8')
+
+def _to_arrow_bytes(df: pd.DataFrame):
+    """Serialize a DataFrame to Arrow IPC bytes for session state
+    
+    Falls back to the DataFrame itself if a column can't be converted to Arrow.
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return df
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _from_arrow_bytes(data) -> pd.DataFrame:
+    """Inverse of _to_arrow_bytes"""
+    if isinstance(data, pd.DataFrame):
+        return data
+    return pa.ipc.open_stream(pa.BufferReader(data)).read_all().to_pandas(types_mapper=pd.ArrowDtype)
+
+# Source columns to show, in display order, and their display names
+COLUMN_MAPPING = {
+    "eid": "eid",
+    "guest_name": "name",
+    "nights": "nights",
+    "property_name": "property_name",
+    "room_type": "room_type",
+    "guest_email": "email",
+    "guest_phone": "phone",
+    "arrival_date": "arrival_date",
+    "departure_date": "departure_date",
+    "invoices_total_amount": "invoices_total_amount",
+    "payments_total_amount": "payments_total_amount",
+    "source": "source"
+}
+
+# Column widths and labels for the arrivals table
+COLUMN_CONFIG = {
+    "eid": st.column_config.TextColumn("EID", width="small"),
+    "name": st.column_config.TextColumn("Name", width="medium"),
+    "nights": st.column_config.NumberColumn("Nights", width="small"),
+    "property_name": st.column_config.TextColumn("Property", width="medium"),
+    "room_type": st.column_config.TextColumn("Room Type", width="medium"),
+    "email": st.column_config.TextColumn("Email", width="medium"),
+    "phone": st.column_config.TextColumn("Phone", width="small"),
+    "arrival_date": st.column_config.DateColumn("Arrival", width="small"),
+    "departure_date": st.column_config.DateColumn("Departure", width="small"),
+    "invoices_total_amount": st.column_config.NumberColumn("Invoice Total", width="small", format="%.0f"),
+    "payments_total_amount": st.column_config.NumberColumn("Payment Total", width="small", format="%.0f"),
+    "source": st.column_config.TextColumn("Source", width="small"),
+}
+
+# Quick-select offsets from today
+QUICK_SELECT_PLACEHOLDER = "— Quick Select —"
+QUICK_OFFSETS = {
+    "Today": timedelta(days=0),
+    "Tomorrow": timedelta(days=1),
+    "In 2 days": timedelta(days=2),
+    "In 3 days": timedelta(days=3),
+    "Next week": timedelta(weeks=1),
+}
+QUICK_SELECT_OPTIONS = [QUICK_SELECT_PLACEHOLDER, *QUICK_OFFSETS]
 
 # Date picker
+today = datetime.now().date()
 col1, col2, col3 = st.columns([2, 1, 1])
 
 with col1:
     arrival_date = st.date_input(
         "Arrivals on:",
-        value=datetime.now().date(),
+        value=today,
         key="arrival_date",
         label_visibility="collapsed"
     )
 
 with col2:
-    quick_options = {
-        "Today": datetime.now().date(),
-        "Tomorrow": datetime.now().date() + timedelta(days=1),
-        "In 2 days": datetime.now().date() + timedelta(days=2),
-        "In 3 days": datetime.now().date() + timedelta(days=3),
-        "Next week": datetime.now().date() + timedelta(weeks=1),
-    }
-    
     quick_select = st.selectbox(
         "Quick Select",
-        options=["— Quick Select —"] + list(quick_options.keys()),
+        options=QUICK_SELECT_OPTIONS,
         key="quick_select",
         label_visibility="collapsed"
     )
     
-    if quick_select != "— Quick Select —":
-        arrival_date = quick_options[quick_select]
+    if quick_select != QUICK_SELECT_PLACEHOLDER:
+        arrival_date = today + QUICK_OFFSETS[quick_select]
         st.rerun()
 
 with col3:
     find_button = st.button("Find arrivals", type="primary", use_container_width=True)
 
+# Derive both date keys once from the picked date
 target_date_str = arrival_date.strftime("%Y-%m-%d")
+clean_date = arrival_date.strftime("%Y%m%d")
 
 if find_button:
     status_placeholder = st.empty()
@@ -70,23 +155,12 @@ if find_button:
     try:
         status_placeholder.info(f"Fetching bookings for {target_date_str}...")
         
-        clean_date = target_date_str.replace("-", "")
-        all_bookings = api.get_all_bookings(params={"date": clean_date})
+        df = fetch_arrivals(api, clean_date)
         
-        if all_bookings:
-            df = normalize_upcoming_arrivals(all_bookings)
-            
-            if not df.empty:
-                if "active" in df.columns:
-                    df_active = df[df["active"] != 0].copy()
-                else:
-                    df_active = df.copy()
-                
-                st.session_state["arrivals_data"] = df_active
-                st.session_state["arrivals_date"] = target_date_str
-                status_placeholder.success(f"Found {len(df_active)} active arrivals")
-            else:
-                status_placeholder.warning("No bookings found.")
+        if not df.empty:
+            st.session_state["arrivals_data"] = _to_arrow_bytes(df)
+            st.session_state["arrivals_date"] = target_date_str
+            status_placeholder.success(f"Found {len(df)} active arrivals")
         else:
             status_placeholder.warning("No bookings found.")
             
@@ -95,62 +169,31 @@ if find_button:
         st.exception(e)
 
 if "arrivals_data" in st.session_state and st.session_state.get("arrivals_date") == target_date_str:
-    df = st.session_state["arrivals_data"]
-    
-    # Select and reorder only the columns you want
-    column_mapping = {
-        "eid": "eid",
-        "guest_name": "name",
-        "nights": "nights",
-        "property_name": "property_name",
-        "room_type": "room_type",
-        "guest_email": "email",
-        "guest_phone": "phone",
-        "arrival_date": "arrival_date",
-        "departure_date": "departure_date",
-        "invoices_total_amount": "invoices_total_amount",
-        "payments_total_amount": "payments_total_amount",
-        "source": "source"
-    }
+    df = _from_arrow_bytes(st.session_state["arrivals_data"])
     
-    # Check which columns exist and select them
-    available_cols = [col for col in column_mapping.keys() if col in df.columns]
+    # Check which columns exist and select them (set lookups instead of Index scans)
+    df_cols = frozenset(df.columns)
+    available_cols = [col for col in COLUMN_MAPPING.keys() if col in df_cols]
     
-    if len(available_cols) < len(column_mapping):
-        missing = set(column_mapping.keys()) - set(available_cols)
+    if len(available_cols) < len(COLUMN_MAPPING):
+        missing = COLUMN_MAPPING.keys() - available_cols
         st.warning(f"Missing columns: {missing}")
     
-    df_display = df[available_cols].copy()
-    
-    # Rename for display
-    df_display.columns = [column_mapping.get(col, col) for col in df_display.columns]
+    # Select and rename for display without an extra full copy
+    df_display = df.loc[:, available_cols].rename(columns=COLUMN_MAPPING)
     
     st.success(f"Showing {len(df_display)} active arrivals for {target_date_str}")
     
-    # Function to highlight rows where invoice != payment
-    def highlight_payment_mismatch(row):
-        if row['invoices_total_amount'] != row['payments_total_amount']:
-            return ['background-color: #ffcccc'] * len(row)
-        return [''] * len(row)
+    # Function to highlight rows where invoice != payment, styling the whole frame at once
+    def highlight_payment_mismatch(frame):
+        styles = pd.DataFrame('', index=frame.index, columns=frame.columns)
+        # Missing amounts count as a mismatch (Arrow comparisons yield NA there)
+        mismatch = frame['invoices_total_amount'].ne(frame['payments_total_amount']).fillna(True)
+        styles.loc[mismatch, :] = 'background-color: #ffcccc'
+        return styles
     
     # Apply styling
-    styled_df = df_display.style.apply(highlight_payment_mismatch, axis=1)
-    
-    # Configure column widths
-    column_config = {
-        "eid": st.column_config.TextColumn("EID", width="small"),
-        "name": st.column_config.TextColumn("Name", width="medium"),
-        "nights": st.column_config.NumberColumn("Nights", width="small"),
-        "property_name": st.column_config.TextColumn("Property", width="medium"),
-        "room_type": st.column_config.TextColumn("Room Type", width="medium"),
-        "email": st.column_config.TextColumn("Email", width="medium"),
-        "phone": st.column_config.TextColumn("Phone", width="small"),
-        "arrival_date": st.column_config.DateColumn("Arrival", width="small"),
-        "departure_date": st.column_config.DateColumn("Departure", width="small"),
-        "invoices_total_amount": st.column_config.NumberColumn("Invoice Total", width="small", format="%.0f"),
-        "payments_total_amount": st.column_config.NumberColumn("Payment Total", width="small", format="%.0f"),
-        "source": st.column_config.TextColumn("Source", width="small"),
-    }
+    styled_df = df_display.style.apply(highlight_payment_mismatch, axis=None)
     
     # Display with styling
     st.dataframe(
@@ -158,13 +201,13 @@ if "arrivals_data" in st.session_state and st.session_state.get("arrivals_date")
         use_container_width=True, 
         hide_index=True, 
         height=None,
-        column_config=column_config
+        column_config=COLUMN_CONFIG
     )
     
     col1, col2 = st.columns(2)
     
     with col1:
-        csv = df_display.to_csv(index=False).encode('utf-8')
+        csv = df_to_csv_bytes(df_display)
         st.download_button(
             label="Download CSV",
             data=csv,
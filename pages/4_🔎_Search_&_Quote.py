@@ -8,7 +8,10 @@ import numpy as np
 from typing import Dict, List, Any
 import requests
 import json
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # Add root directory to Python path
 root_dir = Path(__file__).parent.parent
@@ -24,6 +27,54 @@ st.set_page_config(
     layout="wide"
 )
 
+# Sidebar option constants, built once rather than on every rerun
+BED_BATH_OPTIONS = ("-All", 1, 2, 3, 4, 5, 6, 7, 8)
+UNBOOKABLE_PROPERTIES = frozenset({
+    "SnowDog Village",
+    "Suiboku",
+    "Always Niseko",
+    "Roku"
+})
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_hotel_ids(_session, base_url: str, country_code: str, location_code: str) -> List[str]:
+    """Hotel IDs for a location, cached for an hour since the hotel list rarely changes"""
+    url = f"{base_url}/list?countryCode={country_code}&locationCode={location_code}"
+    response = _session.get(url)
+    response.raise_for_status()
+    json_data = json.loads(response.content)
+    
+    return [hotel['hotelId'] for hotel in json_data.get("hotels", [])]
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_rate_plan_descriptions(_session, base_url: str, hotel_ids: tuple) -> List[Dict]:
+    """Raw rate plan descriptions for a set of hotels, cached for an hour"""
+    # Build the URL with multiple hotelId parameters
+    params = "&".join([f"hotelId={hotel_id}" for hotel_id in hotel_ids])
+    url = f"{base_url}/listRatePlanDescription?{params}"
+    
+    response = _session.get(url)
+    response.raise_for_status()
+    
+    return json.loads(response.content)
+
+
+def _rate_plan_texts(rate_plan: Dict) -> Dict[str, str]:
+    """English/Japanese name and descriptions of one rate plan, blank where missing"""
+    names = rate_plan.get('names', {})
+    descriptions = rate_plan.get('descriptions', {})
+    long_descriptions = rate_plan.get('longDescriptions', {})
+    return {
+        'name_en': names.get('en', ''),
+        'name_ja': names.get('ja', ''),
+        'desc_en': descriptions.get('en', ''),
+        'desc_ja': descriptions.get('ja', ''),
+        'long_desc_en': long_descriptions.get('en', ''),
+        'long_desc_ja': long_descriptions.get('ja', '')
+    }
+
+
 class RoomBossAPI:
     """RoomBoss API client for hotel availability search"""
     def __init__(self):
@@ -39,24 +90,22 @@ class RoomBossAPI:
             st.stop()
             
         self.base_url = "https://api.roomboss.com/extws/hotel/v1"
+        
+        # Pooled keep-alive session shared by all calls (and the parallel availability chunks)
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        self.session.mount("https://", adapter)
 
     def get_hotel_list(self, country_code: str = "jp", location_code: str = "niseko") -> List[str]:
         """Get list of hotel IDs"""
-        url = f"{self.base_url}/list?countryCode={country_code}&locationCode={location_code}"
-        response = requests.get(url, auth=self.auth)
-        json_data = json.loads(response.text)
-        
-        hotel_ids = [f"&hotelId={hotel['hotelId']}" for hotel in json_data.get("hotels", [])]
-        
-        # Split into chunks of 100 for API limit
-        hotel_ids_one = hotel_ids[0:100]
-        hotel_ids_two = hotel_ids[100:]
-        
-        # Convert list to string
-        hotel_ids_string_one = "".join(hotel_ids_one)
-        hotel_ids_string_two = "".join(hotel_ids_two)
+        hotel_ids = [
+            f"&hotelId={hotel_id}"
+            for hotel_id in fetch_hotel_ids(self.session, self.base_url, country_code, location_code)
+        ]
         
-        return [hotel_ids_string_one, hotel_ids_string_two]
+        # Split into chunks of 100 for API limit, each converted to a query string
+        return ["".join(hotel_ids[i:i + 100]) for i in range(0, len(hotel_ids), 100)]
 
     def get_available_stays(
         self,
@@ -65,23 +114,28 @@ class RoomBossAPI:
         checkout: str,
         guests: str
     ) -> List[Dict]:
-        """Get available stays"""
-        resp_lists = []
-        for id_list in hotel_ids_list:
-            api_list_avail = (
+        """Get available hotels across all chunks"""
+        urls = [
+            (
                 f"{self.base_url}/listAvailable?1&"
                 f"checkIn={checkin}&checkOut={checkout}&"
                 f"numberGuests={guests}&excludeConditionsNotMet&"
                 f"rate=ota&locationCode=NISEKO&countryCode=JP{id_list}"
             )
+            for id_list in hotel_ids_list
+            if id_list  # An empty chunk would search with no hotels at all
+        ]
+        
+        # The chunks are independent, so request them concurrently
+        with ThreadPoolExecutor(max_workers=max(1, len(urls))) as executor:
+            responses = list(executor.map(self.session.get, urls))
+        
+        # Keep only the hotel arrays so each parsed body can be freed straight away
+        available_hotels = []
+        for response in responses:
+            available_hotels.extend(json.loads(response.content).get("availableHotels", []))
             
-            avail_hotels = requests.get(api_list_avail, auth=self.auth)
-            resp_dict = json.loads(avail_hotels.text)
-            # Debug: Print raw response
-            print("Raw API Response:", resp_dict)  # Add this line for debugging
-            resp_lists.append(resp_dict)
-            
-        return resp_lists
+        return available_hotels
 
     def get_rate_plan_descriptions(self, hotel_ids: List[str]) -> Dict:
         """Get rate plan descriptions for specified hotels"""
@@ -91,46 +145,44 @@ class RoomBossAPI:
         if not hotel_ids:
             return {}
         
-        # Build the URL with multiple hotelId parameters
-        params = "&".join([f"hotelId={hotel_id}" for hotel_id in hotel_ids])
-        url = f"{self.base_url}/listRatePlanDescription?{params}"
-        
         try:
-            response = requests.get(url, auth=self.auth)
-            
-            if response.status_code != 200:
-                st.warning(f"Failed to fetch rate plan descriptions: {response.status_code}")
-                return {}
-            
-            # Parse response and organize by hotel ID
-            rate_plans_data = json.loads(response.text)
+            rate_plans_data = fetch_rate_plan_descriptions(
+                self.session, self.base_url, tuple(sorted(hotel_ids))
+            )
             
-            # Organize data by hotel ID for easier access
-            organized_data = {}
-            for hotel_data in rate_plans_data:
-                vendor_id = hotel_data.get('vendorId')
-                if vendor_id:
-                    rate_plan_dict = {}
-                    for rate_plan in hotel_data.get('ratePlanDescriptionList', []):
-                        rate_plan_id = rate_plan.get('ratePlanId')
-                        if rate_plan_id:
-                            rate_plan_dict[rate_plan_id] = {
-                                'name_en': rate_plan.get('names', {}).get('en', ''),
-                                'name_ja': rate_plan.get('names', {}).get('ja', ''),
-                                'desc_en': rate_plan.get('descriptions', {}).get('en', ''),
-                                'desc_ja': rate_plan.get('descriptions', {}).get('ja', ''),
-                                'long_desc_en': rate_plan.get('longDescriptions', {}).get('en', ''),
-                                'long_desc_ja': rate_plan.get('longDescriptions', {}).get('ja', '')
-                            }
-                    organized_data[vendor_id] = rate_plan_dict
+            # Organize data by hotel ID for easier access (the Rate Plans tab lists one hotel's plans)
+            organized_data = {
+                hotel_data['vendorId']: {
+                    rate_plan['ratePlanId']: _rate_plan_texts(rate_plan)
+                    for rate_plan in hotel_data.get('ratePlanDescriptionList', [])
+                    if rate_plan.get('ratePlanId')
+                }
+                for hotel_data in rate_plans_data
+                if hotel_data.get('vendorId')
+            }
                     
             return organized_data
             
+        except requests.HTTPError as e:
+            st.warning(f"Failed to fetch rate plan descriptions: {e.response.status_code}")
+            return {}
         except Exception as e:
             st.error(f"Error fetching rate plan descriptions: {str(e)}")
             return {}
 
 
+@st.cache_resource
+def get_roomboss_api():
+    """RoomBossAPI client shared across reruns so its pooled session is reused"""
+    return RoomBossAPI()
+
+
+@st.cache_resource
+def get_management_dict():
+    """Property to management company mapping, loaded from disk once per process"""
+    return get_prop_management()
+
+
 def generate_muwa_link(checkin_date, checkout_date, guests):
     """
     Generate a Muwa booking link with the same search parameters
@@ -214,30 +266,29 @@ def add_booking_links_to_dataframe(df, checkin_date, checkout_date, nights, gues
         pd.DataFrame: DataFrame with booking links added
     """
     df_with_links = df.copy()
+    blank = pd.Series('', index=df_with_links.index)
+    hotel_ids = df_with_links.get('Hotel ID', blank)
+    room_type_ids = df_with_links.get('Room Type ID', blank)
+    hotel_names = df_with_links.get('Hotel Name', blank).astype(str)
     
-    # Generate booking links for each row
-    booking_links = []
-    for idx, row in df_with_links.iterrows():
-        hotel_id = row.get('Hotel ID', '')
-        room_type_id = row.get('Room Type ID', '')
-        hotel_name = row.get('Hotel Name', '')
-        
-        if hotel_id and room_type_id and hotel_id != 'N/A' and room_type_id != 'N/A':
-            link = generate_booking_link(
-                hotel_id, 
-                room_type_id, 
-                checkin_date, 
-                checkout_date, 
-                nights, 
-                guests_input
-            )
-            # Create custom link text with hotel name
-            link_text = f"Book {hotel_name} online and secure your dates"
-            booking_links.append(f'<a href="{link}" target="_blank">{link_text}</a>')
-        else:
-            booking_links.append('')
+    # Only rows with both IDs get a link
+    valid = hotel_ids.notna() & room_type_ids.notna()
+    hotel_ids = hotel_ids.astype(str)
+    room_type_ids = room_type_ids.astype(str)
+    valid &= ~hotel_ids.isin(('', 'N/A')) & ~room_type_ids.isin(('', 'N/A'))
     
-    df_with_links['Booking Link'] = booking_links
+    # Specialise the link template once for this search; only the two IDs vary per row
+    template = generate_booking_link(
+        "{hotel_id}", "{room_type_id}", checkin_date, checkout_date, nights, guests_input
+    )
+    prefix, rest = template.split("{hotel_id}", 1)
+    middle, suffix = rest.split("{room_type_id}", 1)
+    
+    # Build every link column-wise, with custom link text including the hotel name
+    links = prefix + hotel_ids + middle + room_type_ids + suffix
+    anchors = '<a href="' + links + '" target="_blank">Book ' + hotel_names + ' online and secure your dates</a>'
+    
+    df_with_links['Booking Link'] = np.where(valid, anchors, '')
     
     return df_with_links
 
@@ -261,7 +312,7 @@ def init_session_state():
         st.session_state.checkout_dt = None
 
 # This is a modification to make in your process_search_results function
-# to ensure the Hotel ID is preserved when creating the stays_dict
+# to ensure the Hotel ID is preserved on each result row
 
 def process_search_results(
     api: RoomBossAPI,
@@ -274,55 +325,61 @@ def process_search_results(
     # Get hotel list and available stays
     with st.spinner("Searching available properties..."):
         hotel_ids_list = api.get_hotel_list()
-        resp_lists = api.get_available_stays(
+        available_hotels = api.get_available_stays(
             hotel_ids_list,
             checkin,
             checkout,
             guests
         )
 
-    # Process results
-    stays_dict = {}
+    # Process results into row records, indexed by room key
+    records = []
+    room_ids = []
     hotel_ids_used = set()  # New: Track unique hotel IDs
     
-    for response in resp_lists:
-        for hotel in response.get("availableHotels", []):
-            # Store the Hotel ID for later reference
-            hotel_id = hotel.get('hotelId', 'N/A')
-            hotel_ids_used.add(hotel_id)  # New: Add to set of used hotel IDs
-            
-            avail_hotel = RbAvailableHotel(hotel, management_dict)
-            for room_id, avail_room in avail_hotel.avail_rooms.items():
-                # Add Hotel ID to each room's data
-                room_data = {**avail_room, 'Room ID': room_id, 'Hotel ID': hotel_id}
-                stays_dict[room_id] = room_data
+    for hotel in available_hotels:
+        # Store the Hotel ID for later reference
+        hotel_id = hotel.get('hotelId', 'N/A')
+        hotel_ids_used.add(hotel_id)  # New: Add to set of used hotel IDs
+        
+        avail_hotel = RbAvailableHotel(hotel, management_dict)
+        for room_id, avail_room in avail_hotel.avail_rooms.items():
+            # Add Hotel ID to each room's data
+            room_ids.append(room_id)
+            records.append({**avail_room, 'Room ID': room_id, 'Hotel ID': hotel_id})
     
     # New: Store the hotel IDs for later use
     st.session_state.hotel_ids_used = list(hotel_ids_used)
     
-    return pd.DataFrame(stays_dict).T
+    df = pd.DataFrame.from_records(records, index=room_ids)
+    
+    if not df.empty:
+        # Fix numeric dtypes once so filtering, sorting and plotting stay on native arrays
+        df['Price'] = pd.to_numeric(df['Price'], errors='coerce').fillna(0).astype(np.int64)
+        for col in ('Bedrooms', 'Bathrooms', 'Max Guests', 'Quant Avail'):
+            df[col] = pd.to_numeric(df[col], errors='coerce', downcast='integer')
+        
+        # Arrow-backed strings keep the session-state frame compact and speed up str/isin filters
+        for col in ('Rate Plan', 'Hotel Name', 'Room Name', 'Managed By', 'Room ID'):
+            df[col] = df[col].astype('string[pyarrow]')
+    
+    return df
 
 
-def create_price_plot(df, x_jitter, x_positions, x_labels, grouped_data, primary_group, show_trends=True):
-    """Create price distribution plot with trend lines"""
-    above_threshold = df[df['Price'] > 2500000]
-    above_count = len(above_threshold)
-    above_text = f"{above_count} properties above ¥2,500,000" if above_count > 0 else ""
-    
+def _build_distribution_plot(df, x_col, title, xaxis_title, x_min, x_jitter, x_positions, x_labels, margin_left, yaxis_extra=None):
+    """Scatter of one price column against the jittered group positions, shared by both price plots"""
     fig = px.scatter(df,
-                    x="Price",
-                    title="Price Distribution " + above_text,
+                    x=x_col,
+                    title=title,
                     size=[8] * len(df),
                     opacity=0.7,
-                    custom_data=['Room', 'Room ID', 'Price', 'Per Night', 'Rate Plan'])
-    
-    # Remove the capping of values - this is the key change
-    # Instead of capping, we'll display all values at their true amount
-    plot_df = df.copy()
+                    custom_data=['Room', 'Room ID', 'Price', 'Per Night', 'Rate Plan'],
+                    render_mode='webgl')  # Scattergl draws markers on the GPU rather than as SVG nodes
     
+    # Display all values at their true amount (no capping); the frame is only read, so no copy
     fig.update_traces(
         y=x_jitter,
-        x=plot_df['Price'],
+        x=df[x_col],
         marker=dict(
             size=8,
             line=dict(width=0.5, color='darkblue'),
@@ -337,16 +394,16 @@ def create_price_plot(df, x_jitter, x_positions, x_labels, grouped_data, primary
     )
     
     # Calculate a better x-axis range that accommodates all prices
-    max_price = df['Price'].max()
-    x_axis_max = max_price * 1.1
+    x_axis_max = df[x_col].max() * 1.1
     
     fig.update_layout(
         height=max(400, len(x_labels) * 35),
         yaxis_title=None,
-        xaxis_title="Price (¥)",
+        xaxis_title=xaxis_title,
         showlegend=True,
         plot_bgcolor='white',
-        margin=dict(l=180, r=50, t=50, b=50),
+        margin=dict(l=margin_left, r=50, t=50, b=50),
+        uirevision=x_col,  # Keep zoom/pan across reruns
         yaxis=dict(
             ticktext=x_labels,
             tickvals=x_positions,
@@ -356,17 +413,34 @@ def create_price_plot(df, x_jitter, x_positions, x_labels, grouped_data, primary
             dtick=1,
             showgrid=False,
             side='left',
-            domain=[0, 0.95],
-            position=0.02
+            **(yaxis_extra or {})
         ),
         xaxis=dict(
             gridcolor='lightgrey',
             tickformat=',.0f',
-            range=[-20000, x_axis_max],  # Adjusted to accommodate all values
+            range=[x_min, x_axis_max],  # Adjusted to accommodate all values
             showgrid=True
         )
     )
     
+    fig.update_xaxes(showgrid=True)
+    fig.update_yaxes(showgrid=False)
+    
+    return fig
+
+
+def create_price_plot(df, x_jitter, x_positions, x_labels, grouped_data, primary_group, show_trends=True):
+    """Create price distribution plot with trend lines"""
+    above_count = int((df['Price'] > 2500000).sum())
+    above_text = f"{above_count} properties above ¥2,500,000" if above_count > 0 else ""
+    
+    fig = _build_distribution_plot(
+        df, 'Price', "Price Distribution " + above_text, "Price (¥)", -20000,
+        x_jitter, x_positions, x_labels,
+        margin_left=180,
+        yaxis_extra=dict(domain=[0, 0.95], position=0.02)
+    )
+    
     fig.update_traces(
         marker=dict(
             size=10,
@@ -376,78 +450,20 @@ def create_price_plot(df, x_jitter, x_positions, x_labels, grouped_data, primary
         )
     )
     
-    fig.update_xaxes(showgrid=True)
-    fig.update_yaxes(showgrid=False)
-    
     return fig
 
 
 def create_per_night_plot(df, x_jitter, x_positions, x_labels, grouped_data, primary_group, show_trends=True):
     """Create per night price distribution plot with trend lines"""
     per_night_threshold = 300000
-    above_threshold_night = df[df['Per Night'] > per_night_threshold]
-    above_count_night = len(above_threshold_night)
+    above_count_night = int((df['Per Night'] > per_night_threshold).sum())
     above_text_night = f"{above_count_night} properties above ¥300,000/night" if above_count_night > 0 else ""
     
-    fig2 = px.scatter(df,
-                     x="Per Night",
-                     title="Price per Night Distribution " + above_text_night,
-                     size=[8] * len(df),
-                     opacity=0.7,
-                     custom_data=['Room', 'Room ID', 'Price', 'Per Night', 'Rate Plan'])
-    
-    # Remove the capping of values - show all values at their true amount
-    plot_df_night = df.copy()
-    
-    fig2.update_traces(
-        y=x_jitter,
-        x=plot_df_night['Per Night'],
-        marker=dict(
-            size=8,
-            line=dict(width=0.5, color='darkblue'),
-        ),
-        hovertemplate=(
-            "%{customdata[0]}<br>" +
-            "Room ID: %{customdata[1]}<br>" +
-            "Rate Plan: %{customdata[4]}<br>" +
-            "¥%{customdata[2]:,.0f} (¥%{customdata[3]:,.0f}/night)" +
-            "<extra></extra>"
-        )
-    )
-    
-    # Calculate a better x-axis range that accommodates all prices
-    max_per_night = df['Per Night'].max()
-    x_axis_max = max_per_night * 1.1
-    
-    fig2.update_layout(
-        height=max(400, len(x_labels) * 35),
-        yaxis_title=None,
-        xaxis_title="Price per Night (¥)",
-        showlegend=True,
-        plot_bgcolor='white',
-        margin=dict(l=100, r=50, t=50, b=50),
-        yaxis=dict(
-            ticktext=x_labels,
-            tickvals=x_positions,
-            tickangle=0,
-            gridcolor='lightgrey',
-            automargin=True,
-            dtick=1,
-            showgrid=False,
-            side='left'
-        ),
-        xaxis=dict(
-            gridcolor='lightgrey',
-            tickformat=',.0f',
-            range=[-2000, x_axis_max],  # Adjusted to accommodate all values
-            showgrid=True
-        )
+    return _build_distribution_plot(
+        df, 'Per Night', "Price per Night Distribution " + above_text_night, "Price per Night (¥)", -2000,
+        x_jitter, x_positions, x_labels,
+        margin_left=100
     )
-    
-    fig2.update_xaxes(showgrid=True)
-    fig2.update_yaxes(showgrid=False)
-    
-    return fig2
 
 
 def parse_date_input(date_string):
@@ -538,10 +554,9 @@ def handle_sidebar_inputs():
         st.write("---")
         st.write("")
         
-        bed_bath_list = ["-All", 1, 2, 3, 4, 5, 6, 7, 8]
         bedrooms = st.multiselect(
             "Filter by bedrooms",
-            options=bed_bath_list,
+            options=BED_BATH_OPTIONS,
             default="-All"
         )
         
@@ -560,20 +575,13 @@ def handle_sidebar_inputs():
         else:
             management = []
         
-        unbookable_list = [
-            "SnowDog Village",
-            "Suiboku",
-            "Always Niseko",
-            "Roku"
-        ]
-        
         exclude = st.multiselect(
             "Include all properties",
             options=["Yes", "No"],
             default=["No"]
         )
         
-        exclude_list = [] if "Yes" in exclude else unbookable_list
+        exclude_list = () if "Yes" in exclude else UNBOOKABLE_PROPERTIES
         
         # Add the checkbox for showing only lowest prices
         show_lowest_prices = st.checkbox("Show only lowest price per accommodation", value=True)
@@ -586,23 +594,17 @@ def handle_sidebar_inputs():
         exclude_rate_plans = []
         if "stays" in st.session_state:
             try:
-                # Convert all Rate Plan values to string first to avoid the .str accessor error
-                rate_plan_strings = st.session_state.stays["Rate Plan"].astype(str)
+                # Distinct Rate Plan values as strings (dozens, however many rows there are)
+                rate_plan_strings = st.session_state.stays["Rate Plan"].astype(str).unique()
                 
-                # Extract rate plan types (part after the dash)
-                rate_plan_types = []
-                for plan in rate_plan_strings:
-                    if '-' in plan:
-                        # Split on the first dash and take the second part
-                        parts = plan.split('-', 1)
-                        if len(parts) > 1:
-                            rate_plan_types.append(parts[1].strip())
-                    else:
-                        # Handle cases with no dash
-                        rate_plan_types.append(plan)
+                # Extract rate plan types (part after the first dash, or the whole plan if none)
+                rate_plan_types = {
+                    plan.split('-', 1)[1].strip() if '-' in plan else plan
+                    for plan in rate_plan_strings
+                }
                 
                 # Create a list of unique rate plan types
-                unique_rate_plans = ["-None"] + sorted(list(set(rate_plan_types)))
+                unique_rate_plans = ["-None"] + sorted(rate_plan_types)
                 
                 exclude_rate_plans = st.multiselect(
                     "Exclude rate plans",
@@ -642,35 +644,28 @@ def filter_results(
     if exclude_list:
         df = df[~df["Hotel Name"].isin(exclude_list)]
     
-    # Exclude rate plans - with safer filtering
+    # Exclude rate plans - one pass matching any excluded plan at the end of the rate plan
     if exclude_rate_plans:
-        # Make a copy of the DataFrame to avoid modification warnings
-        df_filtered = df.copy()
-        
-        # Convert Rate Plan column to string for consistent filtering
-        df_filtered["Rate Plan"] = df_filtered["Rate Plan"].astype(str)
-        
-        # Filter out entries that match any of the excluded rate plans
-        for rate_plan in exclude_rate_plans:
-            pattern = f"- {rate_plan}$|^{rate_plan}$|{rate_plan}$"
-            df_filtered = df_filtered[~df_filtered["Rate Plan"].str.contains(pattern, regex=True, na=False)]
-        
-        df = df_filtered
+        pattern = "(?:" + "|".join(re.escape(rate_plan) for rate_plan in exclude_rate_plans) + ")$"
+        df = df[~df["Rate Plan"].astype(str).str.contains(pattern, regex=True, na=False)]
     
-    # Add additional columns
-    df["hotel_room_name"] = df["Hotel Name"] + " " + df["Room Name"]
+    # Add additional columns; the hotel/room label is built once per distinct pair, as a categorical
+    if df.empty:
+        # MultiIndex.from_frame can't infer levels from an empty frame (first load, or no matches)
+        df["hotel_room_name"] = pd.Categorical([])
+    else:
+        codes, pairs = pd.MultiIndex.from_frame(df[["Hotel Name", "Room Name"]]).factorize()
+        labels = pairs.get_level_values(0) + " " + pairs.get_level_values(1)
+        df["hotel_room_name"] = pd.Categorical(labels.take(codes))
     
-    # Calculate commission
-    df["Commission"] = np.where(
-        df["Managed By"] == "HN",
-        df.Price * 0.25,
-        df.Price * 0.2
-    )
-    df["Commission"] = df["Commission"].astype(int)
+    # Calculate commission (25% for HN-managed, 20% otherwise) with one multiply
+    rates = np.where(df["Managed By"].to_numpy() == "HN", 0.25, 0.2)
+    df["Commission"] = (df["Price"].to_numpy() * rates).astype(np.int64)
     
-    # Calculate per night price
-    if st.session_state.nights > 0:
-        df["Per Night"] = (df["Price"] / st.session_state.nights).astype(int)
+    # Calculate per night price; Price is int64, so floor division skips the float round trip
+    nights = st.session_state.nights
+    if nights > 0:
+        df["Per Night"] = df["Price"].to_numpy() // nights
     
     # Make sure we have Hotel ID and Room Type ID columns preserved
     if "Hotel ID" not in df.columns and "hotelId" in df.columns:
@@ -680,48 +675,64 @@ def filter_results(
     return df.sort_values(by=["Price", "Room"])
 
 
-def calculate_plot_positions(filtered_df, grouped, primary_group, secondary_group):
-    x_positions = []
-    x_labels = []
-    current_pos = 0
+@st.cache_data(ttl=3600, show_spinner=False)
+def summarize_distribution(df: pd.DataFrame):
+    """Management and bedroom breakdown tables for the summary tab"""
+    mgmt_counts = df.groupby('Managed By', observed=True).size().reset_index(name='Count')
+    mgmt_counts['Percentage'] = (mgmt_counts['Count'] / mgmt_counts['Count'].sum() * 100).round(1)
+    
+    bed_counts = df.groupby('Bedrooms', observed=True).size().reset_index(name='Count')
     
+    return mgmt_counts, bed_counts
+
+def _compute_positions(group_sizes):
+    """Return the x position of every subgroup, with a gap between groups."""
+    group_sizes = np.asarray(group_sizes)
+    # Each group spans 0.8 per subgroup plus a 1.5 gap, subgroups step 0.8 within it
+    group_starts = np.concatenate(([0.0], np.cumsum(group_sizes * 0.8 + 1.5)))[:len(group_sizes)]
+    within_group = np.arange(group_sizes.sum()) - np.repeat(np.cumsum(group_sizes) - group_sizes, group_sizes)
+    return np.repeat(group_starts, group_sizes) + within_group * 0.8
+
+def calculate_plot_positions(filtered_df, grouped, primary_group, secondary_group):
     unique_management = filtered_df[primary_group].unique()
     single_company = len(unique_management) == 1
     
-    for group in sorted(filtered_df[primary_group].unique()):
-        group_data = grouped[grouped[primary_group] == group]
-        num_subgroups = len(group_data)
-        
-        for i, row in enumerate(group_data.iterrows()):
-            x_positions.append(current_pos + (i * 0.8))
-            management = str(group).strip()
-            rate_plan = row[1].iloc[1]
-            rooms = int(row[1]['Quant Avail'])
-            
-            if single_company:
-                property_name = rate_plan.split('-')[0].strip()
-                x_labels.append(f"{property_name}\n({rooms} rooms)")
-            else:
-                x_labels.append(f"{management} - {rate_plan}\n({rooms} rooms)")
-        
-        current_pos += (num_subgroups * 0.8) + 1.5
+    # grouped comes out of groupby sorted by primary_group, so each group's rows are contiguous
+    managements = grouped[primary_group].to_numpy()
+    rate_plans = grouped[secondary_group].to_numpy()
+    rooms = grouped['Quant Avail'].to_numpy()
+    _, group_sizes = np.unique(managements, return_counts=True)
+    x_positions = _compute_positions(group_sizes).tolist()
     
-    x_jitter = []
-    for idx, row in filtered_df.iterrows():
-        pos_idx = grouped[
-            (grouped[primary_group] == row[primary_group]) & 
-            (grouped[secondary_group] == row[secondary_group])
-        ].index[0]
-        base_pos = x_positions[pos_idx]
-        x_jitter.append(base_pos + np.random.uniform(-0.05, 0.05))
+    if single_company:
+        x_labels = [
+            f"{rate_plan.split('-')[0].strip()}\n({int(n)} rooms)"
+            for rate_plan, n in zip(rate_plans, rooms)
+        ]
+    else:
+        x_labels = [
+            f"{str(management).strip()} - {rate_plan}\n({int(n)} rooms)"
+            for management, rate_plan, n in zip(managements, rate_plans, rooms)
+        ]
+    
+    # Look up each row's group position with one join, then jitter all rows at once
+    positions = pd.DataFrame({
+        primary_group: grouped[primary_group].to_numpy(),
+        secondary_group: grouped[secondary_group].to_numpy(),
+        '_pos': x_positions,
+    })
+    base_pos = filtered_df[[primary_group, secondary_group]].merge(
+        positions, on=[primary_group, secondary_group], how='left'
+    )['_pos'].to_numpy()
+    x_jitter = base_pos + np.random.uniform(-0.05, 0.05, size=len(base_pos))
     
     return x_positions, x_labels, x_jitter
 
 def main():
     """Main function for Search & Quote page"""
     init_session_state()
-    api = RoomBossAPI()
-    management_dict = get_prop_management()
+    api = get_roomboss_api()
+    management_dict = get_management_dict()
     
     header_container = st.container()
     results_container = st.container()
@@ -879,13 +890,10 @@ def main():
                 )
             
             if show_lowest_prices:
-                # Step 1: Find the minimum price for each room
-                min_price_idx = filtered_df.groupby(['Hotel Name', 'Room Name']).Price.transform(min) == filtered_df['Price']
-                min_price_df = filtered_df[min_price_idx]
-    
-                # Step 2: When there are multiple rates with the same minimum price for a room,
-                # keep only the first one for each room
-                filtered_df = min_price_df.groupby(['Hotel Name', 'Room Name']).first().reset_index()
+                # Keep the cheapest rate for each room in one groupby pass
+                # (idxmin takes the first row when several rates tie on the minimum price)
+                min_price_idx = filtered_df.groupby(['Hotel Name', 'Room Name'])['Price'].idxmin()
+                filtered_df = filtered_df.loc[min_price_idx].reset_index(drop=True)
             
             # Adjust column ratio to give dataframe more screen space
             col1, col2 = st.columns([3, 1.5])
@@ -993,8 +1001,8 @@ def main():
                     
                     # Management Company Breakdown
                     st.subheader("Management")
-                    mgmt_counts = filtered_df.groupby('Managed By').size().reset_index(name='Count')
-                    mgmt_counts['Percentage'] = (mgmt_counts['Count'] / mgmt_counts['Count'].sum() * 100).round(1)
+                    # Only the two grouped columns are hashed, so unchanged filters reuse the tables
+                    mgmt_counts, bed_counts = summarize_distribution(filtered_df[['Managed By', 'Bedrooms']])
                     
                     # Display as a small table
                     st.dataframe(
@@ -1005,8 +1013,6 @@ def main():
                     )
                     
                     # Bedroom Distribution (without title and percentage)
-                    bed_counts = filtered_df.groupby('Bedrooms').size().reset_index(name='Count')
-                    
                     # Display as a small table without the percentage column
                     st.dataframe(
                         bed_counts,
@@ -1017,10 +1023,10 @@ def main():
                     primary_group = 'Managed By'
                     secondary_group = 'Rate Plan'
                     
-                    grouped = filtered_df.groupby([primary_group, secondary_group]).agg({
-                        'Quant Avail': 'sum',
-                        'Price': ['min', 'max', 'mean']
-                    }).reset_index()
+                    # Rooms per group is the only aggregate either plot reads; computed once for both
+                    grouped = filtered_df.groupby(
+                        [primary_group, secondary_group], observed=True
+                    )['Quant Avail'].sum().reset_index()
                     
                     x_positions, x_labels, x_jitter = calculate_plot_positions(
                         filtered_df, grouped, primary_group, secondary_group
@@ -1035,7 +1041,7 @@ def main():
                         primary_group,
                         show_trends=False
                     )
-                    st.plotly_chart(fig, use_container_width=True)
+                    st.plotly_chart(fig, use_container_width=True, key='price_plot')
                     
                     if "Per Night" in filtered_df.columns:
                         fig2 = create_per_night_plot(
@@ -1047,19 +1053,21 @@ def main():
                             primary_group,
                             show_trends=False
                         )
-                        st.plotly_chart(fig2, use_container_width=True)
+                        st.plotly_chart(fig2, use_container_width=True, key='per_night_plot')
 
                 with tab3:
                     st.subheader("Rate Plan Information")
                     
                     if st.session_state.get("rate_plan_descs"):
-                        # Create a dropdown to select hotel
+                        # Create a dropdown to select hotel, one entry per known Hotel ID
                         hotel_names_dict = {}
-                        for idx, row in filtered_df.iterrows():
-                            hotel_id = row.get("Hotel ID", "N/A")
-                            hotel_name = row.get("Hotel Name", "Unknown Hotel")
-                            if hotel_id != "N/A":
-                                hotel_names_dict[hotel_id] = hotel_name
+                        if "Hotel ID" in filtered_df.columns:
+                            hotels = filtered_df.loc[
+                                filtered_df["Hotel ID"].fillna("N/A") != "N/A"
+                            ].drop_duplicates("Hotel ID")
+                            hotel_names_dict = dict(zip(
+                                hotels["Hotel ID"], hotels["Hotel Name"].fillna("Unknown Hotel")
+                            ))
                         
                         selected_hotel = st.selectbox(
                             "Select a property to view rate plans:", 
@@ -1071,45 +1079,44 @@ def main():
                             rate_plans = st.session_state["rate_plan_descs"][selected_hotel]
                             
                             if rate_plans:
-                                # Create a table of rate plans
-                                rate_plan_data = []
-                                for rp_id, info in rate_plans.items():
-                                    rate_plan_data.append({
-                                        "Rate Plan ID": rp_id,
-                                        "Name": info.get('name_en', ''),
-                                        "Description": info.get('desc_en', '')
-                                    })
+                                # Create a table of rate plans straight from the dict of dicts
+                                rate_plan_df = (
+                                    pd.DataFrame.from_dict(rate_plans, orient='index')
+                                    .reindex(columns=['name_en', 'desc_en'])
+                                    .fillna('')
+                                    .rename(columns={'name_en': 'Name', 'desc_en': 'Description'})
+                                    .rename_axis('Rate Plan ID')
+                                    .reset_index()
+                                )
+                                st.dataframe(
+                                    rate_plan_df,
+                                    hide_index=True
+                                )
                                 
-                                if rate_plan_data:
-                                    st.dataframe(
-                                        pd.DataFrame(rate_plan_data),
-                                        hide_index=True
-                                    )
-                                    
-                                    # Add a section to view detailed info for a specific rate plan
-                                    selected_rate_plan = st.selectbox(
-                                        "Select a rate plan to view details:",
-                                        options=[rp["Rate Plan ID"] for rp in rate_plan_data]
-                                    )
-                                    
-                                    if selected_rate_plan:
-                                        rp_info = rate_plans[selected_rate_plan]
-                                        with st.expander("Rate Plan Details", expanded=True):
-                                            col1, col2 = st.columns(2)
-                                            
-                                            with col1:
-                                                st.markdown("### English")
-                                                st.markdown(f"**Name:** {rp_info.get('name_en', '')}")
-                                                st.markdown(f"**Short Description:** {rp_info.get('desc_en', '')}")
-                                                st.markdown(f"**Long Description:**")
-                                                st.markdown(rp_info.get('long_desc_en', ''))
-                                            
-                                            with col2:
-                                                st.markdown("### Japanese")
-                                                st.markdown(f"**Name:** {rp_info.get('name_ja', '')}")
-                                                st.markdown(f"**Short Description:** {rp_info.get('desc_ja', '')}")
-                                                st.markdown(f"**Long Description:**")
-                                                st.markdown(rp_info.get('long_desc_ja', ''))
+                                # Add a section to view detailed info for a specific rate plan
+                                selected_rate_plan = st.selectbox(
+                                    "Select a rate plan to view details:",
+                                    options=list(rate_plans)
+                                )
+                                
+                                if selected_rate_plan:
+                                    rp_info = rate_plans[selected_rate_plan]
+                                    with st.expander("Rate Plan Details", expanded=True):
+                                        col1, col2 = st.columns(2)
+                                        
+                                        with col1:
+                                            st.markdown("### English")
+                                            st.markdown(f"**Name:** {rp_info.get('name_en', '')}")
+                                            st.markdown(f"**Short Description:** {rp_info.get('desc_en', '')}")
+                                            st.markdown(f"**Long Description:**")
+                                            st.markdown(rp_info.get('long_desc_en', ''))
+                                        
+                                        with col2:
+                                            st.markdown("### Japanese")
+                                            st.markdown(f"**Name:** {rp_info.get('name_ja', '')}")
+                                            st.markdown(f"**Short Description:** {rp_info.get('desc_ja', '')}")
+                                            st.markdown(f"**Long Description:**")
+                                            st.markdown(rp_info.get('long_desc_ja', ''))
                             else:
                                 st.info("No rate plans found for this hotel.")
                         else:
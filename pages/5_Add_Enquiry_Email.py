@@ -9,6 +9,7 @@ import numpy as np
 st.set_page_config(page_title="Add Enquiry Email", layout="wide")
 
 # Define the scope and create credentials
+@st.cache_resource
 def create_gsheet_connection():
     # Define the scope
     scope = ['https://spreadsheets.google.com/feeds',
@@ -25,40 +26,57 @@ def create_gsheet_connection():
     
     return client
 
+# Open the enquiries worksheet once and share the handle
+@st.cache_resource
+def get_worksheet():
+    client = create_gsheet_connection()
+    return client.open(st.secrets["gcp_service_account"]["form_sheet_name_enquiries"]).sheet1
+
 # Get all data from the Google Sheet
+@st.cache_data(ttl=60, show_spinner=False)
 def get_sheet_data():
-    client = create_gsheet_connection()
-    sheet = client.open(st.secrets["gcp_service_account"]["form_sheet_name_enquiries"]).sheet1
+    sheet = get_worksheet()
     
-    # Get all data including headers
-    data = sheet.get_all_records()
+    # Get all values in one payload; the first row holds the headers
+    values = sheet.get_all_values()
+    if not values:
+        return pd.DataFrame()
     
     # Convert to DataFrame
-    df = pd.DataFrame(data)
+    df = pd.DataFrame(values[1:], columns=values[0])
+    
+    # Parse timestamps and normalise emails once, for every helper below
+    if 'Timestamp' in df.columns:
+        # Rows are written with this exact format (see the form below), so skip format inference
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], format="%Y-%m-%d %H:%M:%S", errors='coerce')
+    if 'Email' in df.columns:
+        df['_email_lower'] = df['Email'].str.strip().str.lower()
     
     return df
 
-# Check if email exists in the sheet
-def email_exists(email):
-    if not email:  # Skip check if email is empty
-        return False
-        
+# Set of normalised emails already in the sheet
+@st.cache_data(ttl=60, show_spinner=False)
+def get_email_set():
     df = get_sheet_data()
     
     # If the DataFrame is empty or doesn't have an Email column
     if df.empty or 'Email' not in df.columns:
+        return frozenset()
+    
+    return frozenset(df['_email_lower'].dropna())
+
+# Check if email exists in the set of known emails
+def email_exists(email, existing_emails):
+    if not email:  # Skip check if email is empty
         return False
     
     # Check if email exists (case insensitive)
-    return df['Email'].str.lower().isin([email.lower()]).any()
+    return email.strip().lower() in existing_emails
 
 # Open the Google Sheet and append data
 def append_to_gsheet(data_dict):
-    # Connect to Google Sheets
-    client = create_gsheet_connection()
-    
-    # Open the Google Sheet by its title
-    sheet = client.open(st.secrets["gcp_service_account"]["form_sheet_name_enquiries"]).sheet1
+    # Open the Google Sheet
+    sheet = get_worksheet()
     
     # Convert dictionary to a list of values
     row_data = list(data_dict.values())
@@ -66,10 +84,20 @@ def append_to_gsheet(data_dict):
     # Append the data to the sheet
     sheet.append_row(row_data)
     
+    # Drop the cached sheet so the stats and recent entries include the new row
+    get_sheet_data.clear()
+    get_email_set.clear()
+    get_email_stats.clear()
+    
     return True
 
-# Calculate email statistics
-def get_email_stats():
+# Current time truncated to the minute, so stats can be cached within that minute
+def current_minute():
+    return datetime.now().replace(second=0, microsecond=0)
+
+# Calculate email statistics as of the given minute
+@st.cache_data(ttl=60, show_spinner=False)
+def get_email_stats(now):
     df = get_sheet_data()
     
     # Handle empty DataFrame or one without required columns
@@ -80,20 +108,21 @@ def get_email_stats():
             'month_to_date': 0
         }
     
-    # Ensure Timestamp is datetime
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
+    # Latest submission per unique email; an email counts towards a window
+    # if its latest submission falls inside it
+    latest = df.groupby('_email_lower')['Timestamp'].max()
+    latest_ts = latest.to_numpy()  # datetime64 array; cutoffs below are compared natively
     
     # Calculate total unique emails
-    total_unique = df['Email'].dropna().str.strip().str.lower().nunique()
+    total_unique = len(latest)
     
     # Last 7 days
-    seven_days_ago = datetime.now() - timedelta(days=7)
-    last_7_days = df[df['Timestamp'] >= seven_days_ago]['Email'].dropna().str.strip().str.lower().nunique()
+    seven_days_ago = np.datetime64(now - timedelta(days=7))
+    last_7_days = int((latest_ts >= seven_days_ago).sum())
     
     # Month to date
-    today = datetime.now()
-    month_start = datetime(today.year, today.month, 1)
-    month_to_date = df[df['Timestamp'] >= month_start]['Email'].dropna().str.strip().str.lower().nunique()
+    month_start = np.datetime64(datetime(now.year, now.month, 1))
+    month_to_date = int((latest_ts >= month_start).sum())
     
     return {
         'total_unique': total_unique,
@@ -103,7 +132,7 @@ def get_email_stats():
 
 # Display email statistics
 def show_email_stats():
-    stats = get_email_stats()
+    stats = get_email_stats(current_minute())
     
     st.subheader("Email Statistics")
     
@@ -125,13 +154,12 @@ def get_recent_entries(n=10):
     if df.empty:
         return pd.DataFrame()
     
-    # Try to convert timestamp to datetime for proper sorting
+    # Timestamp is already parsed, so pick the n latest without sorting everything
     if 'Timestamp' in df.columns:
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
-        df = df.sort_values('Timestamp', ascending=False)
+        df = df.nlargest(n, 'Timestamp')
     
-    # Return the top n rows
-    return df.head(n)
+    # Return the top n rows, without the lookup column
+    return df.drop(columns='_email_lower', errors='ignore').head(n)
 
 # Main title
 st.title("Record enquiry email address information")
@@ -143,6 +171,9 @@ left_col, right_col = st.columns([1, 1])
 with left_col:
     st.write("Please fill out the form below and hit submit to send to Google Sheets.")
     
+    # Load known emails while the form renders, so the check on submit needs no fetch
+    existing_emails = get_email_set()
+    
     # Use Streamlit's form container
     with st.form(key="data_form"):
         # Form fields - customize these based on your requirements
@@ -161,25 +192,25 @@ with left_col:
     
     # Handle form submission outside the form but after the form is defined
     if submit_button:
+        # Create a dictionary with the form data, shared by both submit paths
+        form_data = {
+            "Timestamp": timestamp,
+            "First Name": first_name,
+            "Last Name": last_name,
+            "Email": email,
+            "Phone": phone,
+            "Country": country,
+            "Comments": comments
+        }
+        
         # Check if at least one field has data
-        has_data = bool(first_name or last_name or email or phone or country or comments)
+        has_data = any((first_name, last_name, email, phone, country, comments))
         
         if not has_data:
             st.error("Please fill in at least one field before submitting.")
-        elif email and email_exists(email):
+        elif email and email_exists(email, existing_emails):
             st.warning(f"The email '{email}' already exists in the database. You can still submit to update the information.")
             
-            # Create a dictionary with the form data
-            form_data = {
-                "Timestamp": timestamp,
-                "First Name": first_name,
-                "Last Name": last_name,
-                "Email": email,
-                "Phone": phone,
-                "Country": country,
-                "Comments": comments
-            }
-            
             # Add confirmation button for duplicate email
             if st.button("Submit Anyway"):
                 with st.spinner("Submitting data..."):
@@ -189,25 +220,12 @@ with left_col:
                             st.success("Thank you! Your data has been submitted successfully.")
                             st.write("Submitted data:")
                             st.write(pd.DataFrame([form_data]))
-                            # Use st.rerun() instead of experimental_rerun
-                            st.rerun()
                         else:
                             st.error("Something went wrong. Please try again.")
                     except Exception as e:
                         st.error(f"An error occurred: {e}")
                         st.write("Please check your Google Sheets connection settings.")
         else:
-            # Create a dictionary with the form data
-            form_data = {
-                "Timestamp": timestamp,
-                "First Name": first_name,
-                "Last Name": last_name,
-                "Email": email,
-                "Phone": phone,
-                "Country": country,
-                "Comments": comments
-            }
-            
             # Show a spinner while processing
             with st.spinner("Submitting data..."):
                 try:
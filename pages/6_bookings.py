@@ -30,39 +30,65 @@ def create_gsheet_connection():
     client = gspread.authorize(credentials)
     return client
 
-@st.cache_data(ttl=300, hash_funcs={gspread.client.Client: lambda x: None})  # Cache for 5 minutes, ignore gspread client
+# Worksheet (tab) title for each data source key
+SHEET_TABS = {
+    "accommodation": "accommodation",
+    "guest_services": "Guest Services",
+    "accommodation_last_winter": "accommodation_last_winter",
+    "guest_services_last_winter": "guest_services_last_winter",
+}
+
+def _values_to_frame(values):
+    """Build a DataFrame from raw sheet values, taking the first row as headers"""
+    if not values:
+        return pd.DataFrame()
+    
+    # The API trims trailing blank cells, so pad each row out to the header width
+    headers = values[0]
+    df = pd.DataFrame(values[1:]).reindex(columns=range(len(headers))).fillna("")
+    df.columns = headers
+    return df
+
+def _open_bookings_spreadsheet():
+    """Open the bookings Google Sheet by the name configured in secrets"""
+    client = create_gsheet_connection()
+    sheet_name = st.secrets["gcp_service_account"]["bookings_sheet_name"]
+    return client.open(sheet_name)
+
+@st.cache_data(ttl=300)  # Cache for 5 minutes
+def load_all_sheets():
+    """Fetch every booking tab in one batch request - cached to prevent repeated API calls"""
+    spreadsheet = _open_bookings_spreadsheet()
+    
+    # One values.batchGet round trip for all tabs, returned in request order.
+    # The batch fails as a whole if any tab is missing; the error is raised so nothing is cached
+    response = spreadsheet.values_batch_get([f"'{title}'" for title in SHEET_TABS.values()])
+    
+    return {
+        sheet_tab: _values_to_frame(value_range.get("values", []))
+        for sheet_tab, value_range in zip(SHEET_TABS, response.get("valueRanges", []))
+    }
+
+@st.cache_data(ttl=300)  # Cache for 5 minutes
+def load_sheet(sheet_tab):
+    """Fetch a single booking tab - used when the batch request fails"""
+    spreadsheet = _open_bookings_spreadsheet()
+    return _values_to_frame(spreadsheet.worksheet(SHEET_TABS[sheet_tab]).get_all_values())
+
 def get_booking_data(sheet_tab="accommodation"):
-    """Get booking data from Google Sheet - cached to prevent repeated API calls"""
+    """Get booking data for one tab from the batched sheet load"""
+    title = SHEET_TABS.get(sheet_tab, sheet_tab)
     try:
-        client = create_gsheet_connection()
-        
-        # Open the Google Sheet by name
-        sheet_name = st.secrets["gcp_service_account"]["bookings_sheet_name"]
-        spreadsheet = client.open(sheet_name)
-        
-        # Select the specific worksheet (tab)
-        if sheet_tab == "accommodation":
-            worksheet = spreadsheet.worksheet("accommodation")
-        elif sheet_tab == "guest_services":
-            worksheet = spreadsheet.worksheet("Guest Services")
-        elif sheet_tab == "accommodation_last_winter":
-            worksheet = spreadsheet.worksheet("accommodation_last_winter")
-        elif sheet_tab == "guest_services_last_winter":
-            worksheet = spreadsheet.worksheet("guest_services_last_winter")
-        else:
-            worksheet = spreadsheet.sheet1  # fallback to first sheet
-        
-        # Get all data
-        data = worksheet.get_all_records()
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-        
-        return df
+        # Numeric and date columns are coerced in process_booking_data
+        try:
+            return load_all_sheets()[sheet_tab]
+        except gspread.exceptions.APIError:
+            # Fall back to this tab alone so one missing tab doesn't hide the others
+            return load_sheet(sheet_tab)
     
     except Exception as e:
-        st.error(f"Error loading data: {e}")
-        st.info(f"Make sure the sheet '{sheet_tab}' exists in your Google Sheet")
+        st.error(f"Could not load the '{title}' tab: {e}")
+        st.info(f"Make sure the sheet '{title}' exists in your Google Sheet")
         return pd.DataFrame()
 
 @st.cache_data
@@ -241,7 +241,7 @@ def get_recent_bookings_for_date_range(
         
         if response.ok:
             try:
-                data = json.loads(response.text)
+                data = json.loads(response.content)
                 
                 # Check if API call was successful
                 if data.get('success', True):
@@ -315,7 +315,7 @@ def get_today_bookings(api_id: str, api_key: str) -> Dict[str, Any]:
                 }
             
             # Try to parse JSON
-            data = json.loads(response.text)
+            data = json.loads(response.content)
             
             # Check if API returned success
             if not data.get('success', True):
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # holiday_niseko_api.py
 import requests
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 from typing import Optional, Dict, Any, List
 
@@ -42,44 +43,59 @@ class HolidayNisekoAPI:
         params = {"date>=": clean_date}  # Changed from "date" to "date>="
         return self.get_bookings(params=params)
 
-    def get_all_bookings(self, params: Optional[Dict[str, Any]] = None, page_param: str = "page") -> List[Dict[str, Any]]:
-        page = 0
+    @staticmethod
+    def _extract_bookings(payload) -> List[Dict[str, Any]]:
+        if isinstance(payload, list):
+            return payload
+        elif "bookings" in payload:
+            return payload["bookings"]
+        elif "data" in payload:
+            return payload["data"]
+        else:
+            return [payload] if payload else []
+
+    def get_all_bookings(self, params: Optional[Dict[str, Any]] = None, page_param: str = "page", max_workers: int = 4, raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """All pages of bookings for params.
+        
+        A failing page request ends paging and returns what was collected so
+        far, unless raise_errors is set, in which case the error propagates
+        (so callers that cache the result never cache a partial list).
+        """
         out: List[Dict[str, Any]] = []
         base_params = dict(params or {})
 
-        while True:
+        def fetch_page(page):
             current_params = base_params.copy()
             current_params[page_param] = page
-            
-            try:
-                payload = self.get_bookings(params=current_params)
-            except Exception as e:
-                break
-
-            # Extract bookings
-            if isinstance(payload, list):
-                bookings = payload
-            elif "bookings" in payload:
-                bookings = payload["bookings"]
-            elif "data" in payload:
-                bookings = payload["data"]
-            else:
-                bookings = [payload] if payload else []
+            return self.get_bookings(params=current_params)
+
+        # First page on its own (most queries fit in one), then later pages
+        # in concurrent waves consumed in page order
+        page = 0
+        wave = 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Safety limit: pages 0-100
+            while page <= 100:
+                futures = [executor.submit(fetch_page, p) for p in range(page, min(page + wave, 101))]
+                for future in futures:
+                    try:
+                        bookings = self._extract_bookings(future.result())
+                    except Exception:
+                        if raise_errors:
+                            raise
+                        return out
 
-            if not bookings:
-                break
+                    if not bookings:
+                        return out
 
-            out.extend(bookings)
+                    out.extend(bookings)
 
-            # Stop if we got fewer than 20 bookings (last page)
-            if len(bookings) < 20:
-                break
+                    # Stop if we got fewer than 20 bookings (last page)
+                    if len(bookings) < 20:
+                        return out
 
-            page += 1
-            
-            # Safety limit
-            if page > 100:
-                break
+                page += wave
+                wave = max_workers
         
         return out
         
@@ -92,15 +108,15 @@ class HolidayNisekoAPI:
         
         all_bookings = self.get_all_bookings(params={"date": clean_date})
         
+        # Filter inactive bookings before normalizing rather than after
+        active_bookings = [b for b in all_bookings if b.get("active") != 0]
+        
         from utils.normalize_upcoming_arrivals import normalize_upcoming_arrivals
-        df = normalize_upcoming_arrivals(all_bookings)
+        df = normalize_upcoming_arrivals(active_bookings)
         
         if df.empty:
             return []
         
-        if "active" in df.columns:
-            df = df[df["active"] != 0]
-        
         if "eid" in df.columns:
             return df["eid"].astype(str).tolist()
         else:
@@ -233,6 +233,16 @@ class RecentBookingsManager:
                         # Store for display
                         st.session_state.filtered_bookings_data = filtered
                         
+                        # Columnar copy for analytics and export, rebuilt only when the filtered set changes
+                        filter_state = (
+                            time_filter, content_filter, property_filter, season_filter, start_date, end_date,
+                            len(filtered), st.session_state.recent_bookings_last_refresh
+                        )
+                        if (st.session_state.recent_bookings_last_filter_state != filter_state
+                                or "filtered_bookings_df" not in st.session_state):
+                            st.session_state.filtered_bookings_df = pd.DataFrame(filtered)
+                            st.session_state.recent_bookings_last_filter_state = filter_state
+                        
                         # Show stats
                         self.display_stats(filtered, time_filter, start_date, end_date)
                     else:
@@ -561,8 +571,9 @@ class RecentBookingsManager:
         custom_id = booking.get('customId', '')
         booking_source = self._determine_booking_source(custom_id, booking.get('bookingSource', ''))
         
-        # Created date
-        created_date = booking.get('createdDate', '')
+        # Created date (the raw ISO value is kept for date arithmetic)
+        created_date_raw = booking.get('createdDate', '')
+        created_date = created_date_raw
         if created_date:
             try:
                 created_dt = pd.to_datetime(created_date) + pd.offsets.Hour(9)
@@ -576,6 +587,7 @@ class RecentBookingsManager:
             'vendor': vendor,
             'guest_name': guest_name,
             'created_date': created_date,
+            'created_date_raw': created_date_raw,
             'checkin_date': checkin_date,
             'checkin_date_raw': first_item.get('checkIn', '') if items else '',
             'checkout_date_raw': first_item.get('checkOut', '') if items else '',
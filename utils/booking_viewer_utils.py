@@ -57,6 +57,7 @@ def create_cognito_link(reservation_number, check_in, check_out, accommodation,
     
     return f"{base_url}?entry={entry}"
 
+@st.cache_resource
 def connect_to_gspread():
     """
     Connect to Google Sheets API using credentials from Streamlit secrets.
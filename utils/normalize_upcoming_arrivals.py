@@ -4,7 +4,7 @@ Utility: normalize Holiday Niseko API /bookings payload
 into a flat DataFrame for Upcoming Arrivals.
 
 Changes:
-- arrival/departure are DATE-only (no time)
+- arrival/departure are DATE-only (no time), kept as datetime64
 - guest_name is included; first/last retained in DF but not preferred for display
 - eid is the first preferred column
 - Updated to handle flat JSON structure with direct invoice/payment fields
@@ -65,15 +65,13 @@ def normalize_upcoming_arrivals(payload) -> pd.DataFrame:
                 inplace=True,
             )
 
-            # Parse dates and compute nights
+            # Parse dates once (kept as datetime64 at midnight) and compute nights
             for c in ("arrival_date", "departure_date"):
                 if c in df_items.columns:
-                    df_items[c] = pd.to_datetime(df_items[c], errors="coerce").dt.date
+                    df_items[c] = pd.to_datetime(df_items[c], errors="coerce", format="ISO8601").dt.normalize()
 
             if {"arrival_date", "departure_date"} <= set(df_items.columns):
-                a = pd.to_datetime(df_items["arrival_date"], errors="coerce")
-                d = pd.to_datetime(df_items["departure_date"], errors="coerce")
-                df_items["nights"] = (d - a).dt.days
+                df_items["nights"] = (df_items["departure_date"] - df_items["arrival_date"]).dt.days
 
             # Create guest_name
             if "guest_first_name" in df_items.columns or "guest_last_name" in df_items.columns:
@@ -83,34 +81,29 @@ def normalize_upcoming_arrivals(payload) -> pd.DataFrame:
                     + df_items.get("guest_last_name", "").astype(str).fillna("")
                 ).str.strip()
 
-            # Process invoices data - aggregate from invoices array
+            # Process invoices data - aggregate from invoices array into parallel column lists
             try:
-                inv_rows = []
+                rec_ids = []
+                invoice_totals = []
+                payment_totals = []
+                invoice_counts = []
                 for rec in payload:
-                    rec_id = rec.get("id")
-                    invoices = rec.get("invoices", [])
-                    
-                    total_invoice_amount = 0
-                    total_payment_amount = 0
-                    
-                    if invoices:  # If there are invoices
-                        for inv in invoices:
-                            inv_amount = inv.get("invoice_amount", 0) or 0
-                            pay_amount = inv.get("payment_amount", 0) or 0
-                            total_invoice_amount += inv_amount
-                            total_payment_amount += pay_amount
+                    invoices = rec.get("invoices") or []
                     
                     # Always add a row for each booking, even if no invoices
-                    inv_rows.append({
-                        "id": rec_id,
-                        "invoices_total_amount": total_invoice_amount,
-                        "payments_total_amount": total_payment_amount,
-                        "invoices_count": len(invoices) if invoices else 0
-                    })
+                    rec_ids.append(rec.get("id"))
+                    invoice_totals.append(sum(inv.get("invoice_amount", 0) or 0 for inv in invoices))
+                    payment_totals.append(sum(inv.get("payment_amount", 0) or 0 for inv in invoices))
+                    invoice_counts.append(len(invoices))
                 
-                # Create invoice DataFrame and merge
-                if inv_rows:
-                    inv_df = pd.DataFrame(inv_rows)
+                # Create invoice DataFrame column-wise and merge
+                if rec_ids:
+                    inv_df = pd.DataFrame({
+                        "id": rec_ids,
+                        "invoices_total_amount": invoice_totals,
+                        "payments_total_amount": payment_totals,
+                        "invoices_count": invoice_counts,
+                    })
                     df_items = df_items.merge(inv_df, on="id", how="left")
                 else:
                     df_items["invoices_total_amount"] = 0
@@ -164,15 +157,13 @@ def normalize_upcoming_arrivals(payload) -> pd.DataFrame:
         inplace=True,
     )
 
-    # 5) Parse dates (DATE only) & compute nights
+    # 5) Parse dates (DATE only, as datetime64 at midnight) & compute nights
     for c in ("arrival_date", "departure_date"):
         if c in df_items.columns:
-            df_items[c] = pd.to_datetime(df_items[c], errors="coerce").dt.date
+            df_items[c] = pd.to_datetime(df_items[c], errors="coerce", format="ISO8601").dt.normalize()
 
     if {"arrival_date", "departure_date"} <= set(df_items.columns):
-        a = pd.to_datetime(df_items["arrival_date"], errors="coerce")
-        d = pd.to_datetime(df_items["departure_date"], errors="coerce")
-        df_items["nights"] = (d - a).dt.days
+        df_items["nights"] = (df_items["departure_date"] - df_items["arrival_date"]).dt.days
 
     # 6) guest_name (keep first/last columns in DF, but prefer guest_name for display)
     if "guest_first_name" in df_items.columns or "guest_last_name" in df_items.columns:
@@ -203,7 +194,7 @@ def normalize_upcoming_arrivals(payload) -> pd.DataFrame:
             inv_df = pd.DataFrame(inv_rows)
             for c in ("invoice_date", "invoice_due_date", "payment_date"):
                 if c in inv_df.columns:
-                    inv_df[c] = pd.to_datetime(inv_df[c], errors="coerce").dt.date
+                    inv_df[c] = pd.to_datetime(inv_df[c], errors="coerce", format="ISO8601").dt.date
             inv_agg = inv_df.groupby("id", as_index=False).agg(
                 invoices_count=("invoice_id", "count"),
                 invoices_total_amount=("invoice_amount", "sum"),